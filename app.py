@@ -1,42 +1,717 @@
-from dash import Dash, dcc, html, Input, Output, callback
+import os
+import gc
+import json
+import time
+import threading
+import functools
+import hashlib
+import base64
+import argparse
+import mimetypes
+import re
+import random
+import cProfile
+import shutil
+import contextlib
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from dash import Dash, dcc, html, Input, Output, State, ClientsideFunction, Patch, callback, no_update
+from dash.exceptions import PreventUpdate
+from flask import send_from_directory, request, g, jsonify, Response
+from markupsafe import escape
 import plotly.express as px
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import shapely
 import folium
+import topologie
+import egapro
+import statique
+import ressources
 from matplotlib import colormaps
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
 import dash_bootstrap_components as dbc
 from folium.features import CustomIcon
+from folium.plugins import FastMarkerCluster
+
+# Instrumentation (optionnelle) : durée des requêtes de callback et de leurs phases
+# (chargement, filtrage, figure, folium, sérialisation), exposée sur /metriques
+INSTRUMENTATION = os.environ.get("INSTRUMENTATION", "0") == "1"
+ECHANTILLON_PROFILAGE = float(os.environ.get("ECHANTILLON_PROFILAGE", "0"))  # part des requêtes profilées avec cProfile
+DOSSIER_PROFILS = os.environ.get("DOSSIER_PROFILS", "artefacts/profils")
+SEUILS_DUREE = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]  # en secondes (histogrammes)
+
+class Mesures:
+    # Chaque phase compte son temps propre (hors phases imbriquées) ;
+    # la phase 'dash' est le reste de la requête (décodage, validation, sérialisation de la réponse)
+
+    def __init__(self, actif):
+        self.actif = actif
+        self.requetes = {}  # callback -> [nombre, somme, max, compteurs par seuil]
+        self.phases = {}  # (callback, phase) -> idem
+        self.octets = {}  # callback -> taille cumulée des réponses
+        self._local = threading.local()
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, table, cle, duree):
+        with self._verrou:
+            mesure = table.setdefault(cle, [0, 0.0, 0.0, [0] * len(SEUILS_DUREE)])
+            mesure[0] += 1
+            mesure[1] += duree
+            mesure[2] = max(mesure[2], duree)
+            for i, seuil in enumerate(SEUILS_DUREE):
+                if duree <= seuil:
+                    mesure[3][i] += 1
+                    break
+
+    @contextlib.contextmanager
+    def phase(self, nom):
+        if not self.actif:
+            yield
+            return
+        pile = self._local.__dict__.setdefault('pile', [])
+        pile.append(0.0)  # temps passé dans les phases imbriquées
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - debut
+            imbrique = pile.pop()
+            if pile:
+                pile[-1] += duree
+            self.enregistrer(self.phases, (getattr(self._local, 'callback', 'hors_requete'), nom), duree - imbrique)
+
+    def debut_requete(self, callback):
+        self._local.callback = callback
+        self._local.pile = [0.0]
+        self._local.debut = time.perf_counter()
+
+    def fin_requete(self, taille):
+        callback = self._local.__dict__.pop('callback', None)
+        if callback is None:
+            return
+        duree = time.perf_counter() - self._local.debut
+        self.enregistrer(self.phases, (callback, 'dash'), duree - self._local.pile.pop())
+        self.enregistrer(self.requetes, callback, duree)
+        with self._verrou:
+            self.octets[callback] = self.octets.get(callback, 0) + taille
+
+    def json(self, cache):
+        def resume(mesure):
+            nombre, somme, maximum, _ = mesure
+            return {'nombre': nombre, 'somme_s': somme, 'moyenne_s': somme / nombre, 'max_s': maximum}
+        with self._verrou:
+            callbacks = {
+                nom_callback: {
+                    'requetes': resume(mesure),
+                    'octets': self.octets.get(nom_callback, 0),
+                    'phases': {phase: resume(m) for (nom, phase), m in self.phases.items() if nom == nom_callback},
+                }
+                for nom_callback, mesure in self.requetes.items()
+            }
+            hors_requete = {phase: resume(m) for (nom, phase), m in self.phases.items() if nom == 'hors_requete'}
+        return {'callbacks': callbacks, 'hors_requete': hors_requete, 'cache_rendu': cache.statistiques()}
+
+    def prometheus(self, cache):
+        def etiquettes(**valeurs):
+            echappe = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            return ','.join(f'{cle}="{echappe(valeur)}"' for cle, valeur in valeurs.items())
+
+        def histogramme(nom, mesure, **valeurs):
+            nombre, somme, _, compteurs = mesure
+            cumul = 0
+            for seuil, compteur in zip(SEUILS_DUREE, compteurs):
+                cumul += compteur
+                lignes.append(f'{nom}_bucket{{{etiquettes(**valeurs, le=seuil)}}} {cumul}')
+            lignes.append(f'{nom}_bucket{{{etiquettes(**valeurs, le="+Inf")}}} {nombre}')
+            lignes.append(f'{nom}_sum{{{etiquettes(**valeurs)}}} {somme}')
+            lignes.append(f'{nom}_count{{{etiquettes(**valeurs)}}} {nombre}')
+
+        lignes = []
+        with self._verrou:
+            lignes += ['# HELP bilan_callback_duree_secondes Durée des requêtes de callback',
+                       '# TYPE bilan_callback_duree_secondes histogram']
+            for nom_callback, mesure in self.requetes.items():
+                histogramme('bilan_callback_duree_secondes', mesure, callback=nom_callback)
+            lignes += ['# HELP bilan_phase_duree_secondes Temps propre de chaque phase d\'un callback',
+                       '# TYPE bilan_phase_duree_secondes histogram']
+            for (nom_callback, phase), mesure in self.phases.items():
+                histogramme('bilan_phase_duree_secondes', mesure, callback=nom_callback, phase=phase)
+            lignes += ['# HELP bilan_callback_reponse_octets_total Taille cumulée des réponses',
+                       '# TYPE bilan_callback_reponse_octets_total counter']
+            lignes += [f'bilan_callback_reponse_octets_total{{{etiquettes(callback=nom_callback)}}} {octets}'
+                       for nom_callback, octets in self.octets.items()]
+        statistiques = cache.statistiques()
+        lignes += ['# TYPE bilan_cache_rendu_entrees gauge', f"bilan_cache_rendu_entrees {statistiques['entrees']}",
+                   '# TYPE bilan_cache_rendu_succes_total counter', f"bilan_cache_rendu_succes_total {statistiques['succes']}",
+                   '# TYPE bilan_cache_rendu_echecs_total counter', f"bilan_cache_rendu_echecs_total {statistiques['echecs']}"]
+        return '\n'.join(lignes) + '\n'
+
+mesures = Mesures(INSTRUMENTATION)
+
+# Jeux de données : nom -> (fichier source, colonne indexée) ; colonnes obligatoires : voir colonnes_requises
+# Chaque jeu est chargé à la première utilisation (première ouverture de l'onglet qui en a besoin)
+jeux_donnees = {
+    "salaire_effectifs": ("data/salaire_effectifs.csv", "Collège"),
+    "formation_evo": ("data/formation_evo.csv", "Evolution"),
+    "alternance": ("data/alternance.csv", "Indicateur"),
+    "absence_conge_matpat": ("data/absence_conge_matpat.csv", None),
+    "temps_partiel_final": ("data/temps_partiel_final.csv", None),  # onglet 5 : voir images_temps_partiel
+    "maps": ("data/maps.csv", None),
+    "region": ("data/region.geojson", None),
+}
+
+# Sièges sociaux géolocalisés des entreprises (optionnel) : colonnes nom, latitude, longitude et notes Index.
+# S'il est présent, les scores régionaux sont recalculés à partir des entreprises placées dans les régions
+FICHIER_ENTREPRISES = os.environ.get("FICHIER_ENTREPRISES", "data/entreprises.csv")
+if os.path.exists(FICHIER_ENTREPRISES):
+    jeux_donnees["entreprises"] = (FICHIER_ENTREPRISES, None)
+
+# Copie colonnaire typée des données (Parquet), produite par `python app.py --convertir`
+DOSSIER_COLONNAIRE = os.environ.get("DOSSIER_COLONNAIRE", "data/parquet")
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+def chemin_colonnaire(nom):
+    return os.path.join(DOSSIER_COLONNAIRE, f"{nom}.parquet")
+
+def convertir_donnees(dossier=DOSSIER_COLONNAIRE):
+    # Convertit une fois les fichiers de data/ en Parquet (colonnes texte en dictionnaire)
+    if pyarrow is None:
+        raise SystemExit("pyarrow est nécessaire pour convertir les données en Parquet")
+    os.makedirs(dossier, exist_ok=True)
+    for nom, (source, _) in jeux_donnees.items():
+        if source.endswith(".geojson"):
+            gpd.read_file(source).to_parquet(os.path.join(dossier, f"{nom}.parquet"))
+            continue
+        df = pd.read_csv(source)
+        for colonne in df.columns:
+            if not pd.api.types.is_numeric_dtype(df[colonne]):
+                df[colonne] = df[colonne].astype("category")
+        df.to_parquet(os.path.join(dossier, f"{nom}.parquet"), index=False)
+    print(f"{len(jeux_donnees)} jeux de données convertis dans {dossier}/")
+
+def lire_jeu(nom):
+    # Lit la copie Parquet si elle est à jour (mappée en mémoire), sinon le fichier source
+    source, _ = jeux_donnees[nom]
+    colonnaire = chemin_colonnaire(nom)
+    a_jour = (pyarrow is not None and os.path.exists(colonnaire)
+              and os.path.getmtime(colonnaire) >= os.path.getmtime(source))
+    if source.endswith(".geojson"):
+        return gpd.read_parquet(colonnaire) if a_jour else gpd.read_file(source)
+    if not a_jour:
+        return pd.read_csv(source)
+    df = pd.read_parquet(colonnaire, memory_map=True)
+    # Colonnes dictionnaire -> texte (plotly express ne gère pas les agrégations sur catégories)
+    for colonne in df.select_dtypes("category").columns:
+        df[colonne] = df[colonne].astype(df[colonne].cat.categories.dtype)
+    return df
+
+# Jeu chargé : données, index des sous-ensembles, numéro de version et signature du fichier lu,
+# remplacés d'un seul bloc quand le fichier source change (voir recharger_jeu)
+JeuCharge = namedtuple('JeuCharge', ['df', 'index', 'vide', 'version', 'signature'])
+
+jeux_charges = {}
+_verrou_donnees = threading.Lock()
+
+# Index des données : sous-ensembles pré-calculés une fois au chargement du jeu,
+# clé = Collège/Evolution/Indicateur
+def indexer(df, colonne):
+    return {valeur: groupe for valeur, groupe in df.groupby(colonne, sort=False, observed=True)}
+
+def charger_jeu(nom, version):
+    signature = signature_fichier(jeux_donnees[nom][0])
+    with mesures.phase('chargement'):
+        df = lire_jeu(nom)
+        colonne = jeux_donnees[nom][1]
+        index = indexer(df, colonne) if colonne else {}
+    return JeuCharge(df, index, df.iloc[0:0], version, signature)
+
+def etat_jeu(nom):
+    if nom not in jeux_charges:
+        with _verrou_donnees:
+            if nom not in jeux_charges:
+                jeux_charges[nom] = charger_jeu(nom, 1)
+    return jeux_charges[nom]
+
+def jeu(nom):
+    return etat_jeu(nom).df
+
+def recharger_jeu(nom):
+    # Relit un jeu déjà chargé ; les requêtes en cours gardent la version précédente
+    ancien = jeux_charges.get(nom)
+    if ancien is None:
+        return False  # jamais chargé : il sera lu à jour à sa première utilisation
+    nouveau = charger_jeu(nom, ancien.version + 1)
+    # Un fichier qui perd une des colonnes lues par les rendus n'est pas pris en compte
+    manquantes = [colonne for colonne in colonnes_requises.get(nom, []) if colonne not in nouveau.df.columns]
+    if manquantes:
+        raise ValueError(f"colonnes manquantes : {', '.join(map(str, manquantes))}")
+    jeux_charges[nom] = nouveau
+    return True
+
+def version_jeux(*noms):
+    # Version des jeux de données chargés (incrémentée à chaque rechargement)
+    return tuple(etat_jeu(nom).version for nom in noms)
+
+def par_version(*noms):
+    # Décorateur : calcul dérivé des jeux `noms` mis en cache par version de ces jeux. Un calcul commencé
+    # sur l'ancienne version pendant un rechargement ne remplace pas le résultat de la nouvelle
+    def decorateur(fonction):
+        calcul = functools.lru_cache(maxsize=2)(lambda version: fonction())
+
+        @functools.wraps(fonction)
+        def enveloppe():
+            return calcul(version_jeux(*noms))
+        return enveloppe
+    return decorateur
+
+def modalites(nom, colonne):
+    # Valeurs uniques d'une colonne, dans l'ordre d'apparition (listes déroulantes)
+    return jeu(nom)[colonne].unique()
+
+def tranche(nom, valeur):
+    etat = etat_jeu(nom)
+    with mesures.phase('filtrage'):
+        return etat.index.get(valeur, etat.vide)
+
+# Paramètres de la géométrie des régions (modifiables par variables d'environnement)
+TOLERANCE_SIMPLIFICATION = float(os.environ.get("TOLERANCE_SIMPLIFICATION", "0.005"))  # en degrés
+PRECISION_COORDONNEES = float(os.environ.get("PRECISION_COORDONNEES", "0.0001"))  # grille d'arrondi, 0 = pleine précision
+
+def construire_geometrie_regions(gdf, tolerance, precision):
+    # Simplifie la géométrie et la sérialise en GeoJSON une seule fois
+    geometrie = gdf.geometry
+    if tolerance:
+        geometrie = geometrie.simplify(tolerance, preserve_topology=True)
+    if precision:
+        geometrie = gpd.GeoSeries(shapely.set_precision(geometrie.values, precision), index=gdf.index, crs=gdf.crs)
+    regions = gpd.GeoDataFrame({'Région': gdf['Région']}, geometry=geometrie, crs=gdf.crs)
+    return regions.to_json(drop_id=True)
+
+@par_version("region")
+def geometrie_regions():
+    # Cache de géométrie construit au premier affichage de la carte et partagé par toutes les requêtes
+    gdf1 = jeu("region").rename(columns={'nom': 'Région'})
+    geometrie_regions_json = construire_geometrie_regions(gdf1, TOLERANCE_SIMPLIFICATION, PRECISION_COORDONNEES)
+    return [
+        (feature['properties']['Région'], feature['geometry'])
+        for feature in json.loads(geometrie_regions_json)['features']
+    ]
+
+# Marques laissées par geojson_indicateur / topojson_indicateur à la place des coordonnées : folium ne
+# sérialise que les propriétés, inserer_geometrie remplace ensuite les marques par le JSON en cache
+MARQUE_COORDONNEES = "coordonnees-region-%d"
+MARQUE_ARCS = "arcs-regions"
+
+@par_version("region")
+def coordonnees_serialisees():
+    # Coordonnées de chaque région sérialisées une seule fois par version du fichier
+    return [json.dumps(geometrie['coordinates'], separators=(',', ':')) for _, geometrie in geometrie_regions()]
+
+# Encodage de la géométrie envoyée à la carte : "geojson" (polygones simplifiés) ou
+# "topojson" (coordonnées quantifiées, frontières communes partagées, plus compact)
+ENCODAGE_GEOMETRIE = os.environ.get("ENCODAGE_GEOMETRIE", "geojson")
+QUANTIFICATION_TOPOJSON = int(os.environ.get("QUANTIFICATION_TOPOJSON", "100000"))  # taille de la grille
+
+# Moteur de la carte : "folium" (page Leaflet publiée, affichée dans une iframe) ou "plotly"
+# (choroplèthe dcc.Graph : géométrie envoyée une fois avec l'onglet, seules les valeurs changent ensuite)
+MOTEUR_CARTE = os.environ.get("MOTEUR_CARTE", "folium")
+
+@par_version("region")
+def topologie_regions():
+    gdf1 = jeu("region").rename(columns={'nom': 'Région'})
+    regions = [({'Région': region}, geometrie) for region, geometrie in zip(gdf1['Région'], gdf1.geometry)]
+    return topologie.construire_topologie(regions, QUANTIFICATION_TOPOJSON, TOLERANCE_SIMPLIFICATION)
+
+@par_version("region")
+def arcs_serialises():
+    return json.dumps(topologie_regions()['arcs'], separators=(',', ':'))
+
+def inserer_geometrie(page):
+    # Remplace les marques de géométrie de la page rendue par le JSON sérialisé en cache
+    def remplacement(marque):
+        if marque.group(1) == MARQUE_ARCS:
+            return arcs_serialises()
+        return coordonnees_serialisees()[int(marque.group(2))]
+    return re.sub(r'"(%s|%s)"' % (MARQUE_ARCS, MARQUE_COORDONNEES.replace("%d", r"(\d+)")), remplacement, page)
+
+@par_version("entreprises", "region")
+def entreprises_placees():
+    # Entreprises du fichier avec leur région, placées une fois par version des fichiers lus
+    entreprises = jeu("entreprises")
+    gdf1 = jeu("region").rename(columns={'nom': 'Région'})
+    with mesures.phase('chargement'):
+        regions = egapro.placer_entreprises(entreprises["longitude"].to_numpy(dtype=float),
+                                            entreprises["latitude"].to_numpy(dtype=float),
+                                            gdf1['Région'].to_numpy(), gdf1.geometry.values)
+    return entreprises.assign(**{egapro.COLONNE_REGION: regions})
+
+@par_version("entreprises", "region")
+def scores_entreprises():
+    return egapro.agreger_entreprises(entreprises_placees(), indicateur_df6)
+
+def scores_regions():
+    # Scores régionaux : recalculés depuis les entreprises si leur fichier est présent, sinon data/maps.csv
+    return scores_entreprises() if "entreprises" in jeux_donnees else jeu("maps")
+
+# Fichiers lus par la carte (invalidation du cache de rendu)
+JEUX_CARTE = [nom for nom in ("maps", "region", "entreprises") if nom in jeux_donnees]
+SOURCES_CARTE = [jeux_donnees[nom][0] for nom in JEUX_CARTE]
+
+@mesures.phase('filtrage')
+def topojson_indicateur(indicateur):
+    # Même principe que geojson_indicateur : les arcs en cache sont insérés tels quels dans la page
+    topo = topologie_regions()
+    valeurs = scores_regions().set_index('Région')[indicateur].to_dict()
+    geometries = [
+        {**geometrie, 'properties': {'Région': region, indicateur: valeurs[region] if pd.notna(valeurs.get(region)) else None}}
+        for geometrie in topo['objects']['regions']['geometries']
+        for region in [geometrie['properties']['Région']]
+    ]
+    return {**topo, 'arcs': MARQUE_ARCS, 'objects': {'regions': {'type': 'GeometryCollection', 'geometries': geometries}}}
+
+@mesures.phase('filtrage')
+def geojson_indicateur(indicateur):
+    # Joint les valeurs d'un indicateur à la géométrie en cache : seules les marques des coordonnées
+    # passent par folium, la géométrie sérialisée est insérée par inserer_geometrie
+    valeurs = scores_regions().set_index('Région')[indicateur].to_dict()
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'properties': {'Région': region, indicateur: valeurs[region] if pd.notna(valeurs.get(region)) else None},
+                'geometry': {'type': geometrie['type'], 'coordinates': MARQUE_COORDONNEES % numero},
+            }
+            for numero, (region, geometrie) in enumerate(geometrie_regions())
+        ],
+    }
 
-# Charger les données
-df1 = pd.read_csv("data/salaire_effectifs.csv")
-df2 = pd.read_csv("data/formation_evo.csv")
-df3 = pd.read_csv("data/alternance.csv")
-df4 = pd.read_csv("data/absence_conge_matpat.csv")
-df5 = pd.read_csv("data/temps_partiel_final.csv")
-df6 = pd.read_csv("data/maps.csv")
-gdf1 = gpd.read_file("data/region.geojson")
-gdf1.rename(columns={'nom': 'Région'}, inplace=True)
-gdf1 = gdf1.merge(df6, on='Région', how='left')
-
-# Extraire les évolutions uniques pour la liste déroulante
-evolutions = df2["Evolution"].unique()
-colleges = df1["Collège"].unique()
-colleges_df4 = df4["Collège"].unique()
-colleges_df5 = df5["Collège"].unique()
 indicateur_df6 = ["Note Ecart rémunération", "Note Ecart taux de promotion", "Note Ecart taux d'augmentation (hors promotion)", 
                       "Note Ecart taux d'augmentation", "Note Hautes rémunérations",
                       "Note Retour congé maternité", "Note Index"]
 
-app = Dash(suppress_callback_exceptions=True)
+# Colonnes lues par les rendus et l'API, par jeu de données (voir jeux_donnees) : un fichier rechargé
+# qui en perd une est refusé ; les autres colonnes (index sans nom, doublons renommés par pandas) peuvent changer
+colonnes_requises = {
+    "salaire_effectifs": ["Année", "Collège", "Genre", "Salaire mensuel moyen (€, brut)", "Nombre de salariés"],
+    "formation_evo": ["Année", "Collège", "Genre", "Nombre de salariés", "Evolution", "Evolutions",
+                      "Population formée", "Proportion d'évolutions (%)", "Proportion d'employés formés (%)"],
+    "alternance": ["Année", "Indicateur", "Genre", "Nombre de contrats"],
+    "absence_conge_matpat": ["Année", "Collège", "Nombre d'heures moyen de congé maternité par salariée",
+                             "Nombre d'heures moyen de congé paternité par salarié",
+                             "Ecart en pourcentage du temps d'absence pour congé maternité/paternité"],
+    "temps_partiel_final": ["Année", "Collège", "Genre", "Metrique", "Valeur"],
+    "maps": ["Région", *indicateur_df6],
+    "region": ["nom", "geometry"],
+    "entreprises": ["nom", "latitude", "longitude", *indicateur_df6],
+}
+
+# Filtrage des onglets 1, 2 et 5 dans le navigateur (callbacks clientside) plutôt que sur le serveur
+FILTRAGE_CLIENT = os.environ.get("FILTRAGE_CLIENT", "1") == "1"
+
+# Paramètres du cache de rendu des callbacks
+TAILLE_CACHE_RENDU = int(os.environ.get("TAILLE_CACHE_RENDU", "256"))
+INTERVALLE_VERIFICATION_SOURCES = float(os.environ.get("INTERVALLE_VERIFICATION_SOURCES", "2"))  # en secondes
+
+def signature_fichier(chemin):
+    try:
+        stat = os.stat(chemin)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+# Allègement des figures envoyées au navigateur : modèle de mise en page réduit (défini plus bas),
+# attributs de trace égaux à leur valeur par défaut retirés, tableaux numériques encodés en binaire
+ALLEGER_FIGURES = os.environ.get("ALLEGER_FIGURES", "1") == "1"
+
+# Attributs de trace retirés quand ils valent la valeur par défaut de plotly.js
+DEFAUTS_TRACE = {'xaxis': 'x', 'yaxis': 'y', 'orientation': 'v', 'showlegend': True}
+DEFAUTS_MARKER = {'symbol': 'circle', 'pattern': {'shape': ''}}
+DOMAINE_COMPLET = {'x': [0.0, 1.0], 'y': [0.0, 1.0]}
+
+# Attributs numériques encodés en tableaux typés (base64), à partir de TAILLE_MIN_TABLEAU_TYPE valeurs
+CLES_TABLEAU_TYPE = ('x', 'y', 'z', 'values', 'lat', 'lon')
+TAILLE_MIN_TABLEAU_TYPE = 8
+TYPES_ENTIERS = [('i1', np.int8), ('i2', np.int16), ('i4', np.int32)]
+
+def tableau_type(valeurs):
+    # Liste de nombres -> {'dtype', 'bdata'} décodé par plotly.js ; toute autre valeur est renvoyée telle quelle
+    if not isinstance(valeurs, list) or len(valeurs) < TAILLE_MIN_TABLEAU_TYPE:
+        return valeurs
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valeurs):
+        return valeurs
+    tableau = np.array(valeurs, dtype=np.float64)
+    if not np.isfinite(tableau).all():
+        return valeurs
+    dtype, type_numpy = 'f8', np.float64
+    if all(isinstance(v, int) for v in valeurs):
+        for dtype, type_numpy in TYPES_ENTIERS:
+            if np.iinfo(type_numpy).min <= tableau.min() and tableau.max() <= np.iinfo(type_numpy).max:
+                break
+        else:
+            dtype, type_numpy = 'f8', np.float64
+    return {'dtype': dtype, 'bdata': base64.b64encode(tableau.astype(type_numpy).tobytes()).decode()}
+
+def alleger_trace(trace):
+    for cle, defaut in DEFAUTS_TRACE.items():
+        if trace.get(cle) == defaut:
+            del trace[cle]
+    if trace.get('legendgroup') == trace.get('name'):
+        trace.pop('legendgroup', None)
+    if trace.get('domain') == DOMAINE_COMPLET:
+        del trace['domain']
+    marker = trace.get('marker', {})
+    for cle, defaut in DEFAUTS_MARKER.items():
+        if marker.get(cle) == defaut:
+            del marker[cle]
+    if trace.get('line', {}).get('dash') == 'solid':
+        del trace['line']['dash']
+    for cle in CLES_TABLEAU_TYPE:
+        if cle in trace:
+            trace[cle] = tableau_type(trace[cle])
+
+def alleger_sortie(valeur):
+    # Parcourt une sortie de callback sérialisée (figure, composants, liste de sorties) et allège chaque figure
+    if isinstance(valeur, dict):
+        if isinstance(valeur.get('data'), list) and isinstance(valeur.get('layout'), dict):
+            for trace in valeur['data']:
+                if isinstance(trace, dict):
+                    alleger_trace(trace)
+            return valeur
+        for enfant in valeur.values():
+            alleger_sortie(enfant)
+    elif isinstance(valeur, list):
+        for enfant in valeur:
+            alleger_sortie(enfant)
+    return valeur
+
+def serialiser(sortie):
+    # Sortie de callback -> structure JSON (allégée si ALLEGER_FIGURES)
+    valeur = json.loads(to_json_plotly(sortie))
+    return alleger_sortie(valeur) if ALLEGER_FIGURES else valeur
+
+class CacheRendu:
+    # Cache LRU borné des sorties de callbacks, clé = (callback, valeurs d'entrée)
+    # Les sorties sont stockées sérialisées (structure JSON) et invalidées
+    # quand un des fichiers sources du callback change sur le disque
+
+    def __init__(self, taille_max, intervalle_verification):
+        self.taille_max = taille_max
+        self.intervalle_verification = intervalle_verification
+        self.entrees = OrderedDict()
+        self.sources = {}  # nom du callback -> fichiers dont il dépend
+        self.signatures = {}  # fichier -> (mtime, taille) au moment du rendu
+        self.domaines = {}  # nom du callback -> fonction renvoyant les valeurs d'entrée possibles
+        self.fonctions = {}  # nom du callback -> callback mis en cache
+        self.succes = 0
+        self.echecs = 0
+        # Fichiers modifiés -> relecture des données et invalidation (voir recharger_fichiers) ;
+        # None quand la surveillance des données s'en charge
+        self.rechargement = None
+        self._verrou = threading.Lock()
+        self._verrou_verification = threading.Lock()
+        self._derniere_verification = 0.0
+
+    def verifier_sources(self):
+        maintenant = time.monotonic()
+        if self.rechargement is None or maintenant - self._derniere_verification < self.intervalle_verification:
+            return
+        # Une seule requête vérifie à la fois, les autres continuent avec les données en place
+        if not self._verrou_verification.acquire(blocking=False):
+            return
+        try:
+            self._derniere_verification = maintenant
+            modifies = {chemin for chemin, signature in list(self.signatures.items())
+                        if signature_fichier(chemin) != signature}
+            if modifies:
+                # Les signatures des fichiers relus sont mises à jour par invalider ; un fichier refusé est revu plus tard
+                self.rechargement(modifies)
+        finally:
+            self._verrou_verification.release()
+
+    def invalider(self, fichiers=None):
+        # Sans argument : vide tout le cache ; sinon seulement les callbacks dépendant des fichiers
+        # Renvoie les clés retirées (voir rechauffer)
+        with self._verrou:
+            if fichiers is None:
+                cles = list(self.entrees)
+                self.entrees.clear()
+                return cles
+            for chemin in fichiers:
+                if chemin in self.signatures:
+                    self.signatures[chemin] = signature_fichier(chemin)
+            noms = {nom for nom, sources in self.sources.items() if sources & set(fichiers)}
+            cles = [cle for cle in self.entrees if cle[0] in noms]
+            for cle in cles:
+                del self.entrees[cle]
+            return cles
+
+    def rechauffer(self, cles):
+        # Rend à nouveau des entrées invalidées, pour que les requêtes suivantes les trouvent en cache
+        for cle in cles:
+            self.fonctions[cle[0]](*cle[1:])
+
+    def lire(self, cle):
+        with self._verrou:
+            if cle in self.entrees:
+                self.entrees.move_to_end(cle)
+                self.succes += 1
+                return True, self.entrees[cle]
+            self.echecs += 1
+            return False, None
+
+    def ecrire(self, cle, valeur):
+        with self._verrou:
+            self.entrees[cle] = valeur
+            self.entrees.move_to_end(cle)
+            while len(self.entrees) > self.taille_max:
+                self.entrees.popitem(last=False)
+
+    def statistiques(self):
+        total = self.succes + self.echecs
+        return {
+            'entrees': len(self.entrees),
+            'taille_max': self.taille_max,
+            'succes': self.succes,
+            'echecs': self.echecs,
+            'taux_succes': self.succes / total if total else 0.0,
+        }
+
+    def memoriser(self, nom, sources, domaine=None):
+        # Décorateur : met en cache la sortie sérialisée du callback `nom`
+        # `domaine` renvoie les valeurs d'entrée à pré-calculer (voir precalculer)
+        self.sources[nom] = set(sources)
+        self.domaines[nom] = domaine
+        for chemin in sources:
+            self.signatures.setdefault(chemin, signature_fichier(chemin))
+
+        def decorateur(fonction):
+            @functools.wraps(fonction)
+            def enveloppe(*args):
+                self.verifier_sources()
+                cle = (nom,) + args
+                trouve, valeur = self.lire(cle)
+                if trouve:
+                    return valeur
+                sortie = fonction(*args)
+                with mesures.phase('serialisation'):
+                    valeur = serialiser(sortie)
+                self.ecrire(cle, valeur)
+                return valeur
+            self.fonctions[nom] = enveloppe
+            return enveloppe
+        return decorateur
+
+cache_rendu = CacheRendu(TAILLE_CACHE_RENDU, INTERVALLE_VERIFICATION_SOURCES)
+
+# Callbacks lourds (carte) exécutés en arrière-plan dans un processus séparé, avec résultats sur disque
+# (nécessite `pip install "dash[diskcache]"`, sinon exécution synchrone)
+CALLBACKS_ARRIERE_PLAN = os.environ.get("CALLBACKS_ARRIERE_PLAN", "1") == "1"
+DOSSIER_ARRIERE_PLAN = os.environ.get("DOSSIER_ARRIERE_PLAN", "artefacts/arriere_plan")
+DUREE_CACHE_ARRIERE_PLAN = int(os.environ.get("DUREE_CACHE_ARRIERE_PLAN", "86400"))  # en secondes
+
+gestionnaire_arriere_plan = None
+sources_arriere_plan = set()  # fichiers lus par les callbacks en arrière-plan (voir callback_arriere_plan)
+if CALLBACKS_ARRIERE_PLAN:
+    try:
+        import diskcache
+        import psutil
+        from dash import DiskcacheManager
+        cache_disque = diskcache.Cache(DOSSIER_ARRIERE_PLAN)
+        # Résultats gardés (et non effacés à la première lecture) par version des fichiers lus par ces callbacks :
+        # des requêtes identiques simultanées reçoivent toutes le même résultat
+        gestionnaire_arriere_plan = DiskcacheManager(
+            cache_disque, cache_by=[lambda: [signature_fichier(chemin) for chemin in sorted(sources_arriere_plan)]],
+            expire=DUREE_CACHE_ARRIERE_PLAN)
+    except ImportError:
+        pass
+
+# Ressources front copiées localement (python app.py --vendoriser) : exclues des assets chargés par Dash,
+# servies sous /ressources avec cache immuable (le nom de leur dossier change avec leur contenu)
+DUREE_CACHE_RESSOURCES = 365 * 24 * 3600  # en secondes
+manifeste_ressources = ressources.charger_manifeste()
+
+app = Dash(suppress_callback_exceptions=True, background_callback_manager=gestionnaire_arriere_plan,
+           assets_path_ignore=['^vendor$'])
+
+def url_ressource(url):
+    # URL locale d'une ressource copiée, URL d'origine sinon
+    if url in manifeste_ressources:
+        return app.get_relative_path(f"/ressources/{manifeste_ressources[url]}")
+    return url
+
+@app.server.route('/ressources/<path:chemin>')
+def servir_ressource(chemin):
+    # Variante précompressée (brotli, puis gzip) si le navigateur l'accepte
+    dossier = os.path.abspath(ressources.DOSSIER_VENDOR)
+    fichier = chemin
+    encodage = None
+    for candidat, suffixe in (('br', '.br'), ('gzip', '.gz')):
+        if candidat in request.accept_encodings and os.path.isfile(os.path.join(dossier, chemin + suffixe)):
+            fichier, encodage = chemin + suffixe, candidat
+            break
+    reponse = send_from_directory(dossier, fichier, mimetype=mimetypes.guess_type(chemin)[0],
+                                  max_age=DUREE_CACHE_RESSOURCES)
+    if encodage:
+        reponse.headers['Content-Encoding'] = encodage
+    reponse.vary.add('Accept-Encoding')
+    reponse.cache_control.public = True
+    reponse.cache_control.immutable = True
+    return reponse
+
+def vendoriser_ressources():
+    # Scripts et styles de la carte folium (page rendue et ses variantes) et logo EDF
+    page = carte_folium(indicateur_df6[0]).get_root().render()
+    # Variantes absentes de la page rendue : TopoJSON et marqueurs groupés (sans fichier des entreprises)
+    variantes = folium.TopoJson.default_js + FastMarkerCluster.default_js + FastMarkerCluster.default_css
+    urls = ressources.urls_externes(page) + [url for _, url in variantes] + [ressources.LOGO_EDF]
+    manifeste = ressources.vendoriser(urls)
+    print(f"{len(manifeste)} ressources copiées dans {ressources.DOSSIER_VENDOR}")
+
+if INSTRUMENTATION:
+    @app.server.before_request
+    def debut_mesure():
+        if not request.path.endswith('/_dash-update-component'):
+            return
+        # Un callback est identifié par ses sorties ("id.propriété", plusieurs séparées par "...")
+        mesures.debut_requete((request.get_json(silent=True) or {}).get('output', 'inconnu'))
+        if ECHANTILLON_PROFILAGE and random.random() < ECHANTILLON_PROFILAGE:
+            g.profil = cProfile.Profile()
+            g.profil.enable()
+
+    @app.server.after_request
+    def fin_mesure(reponse):
+        profil = g.pop('profil', None)
+        if profil is not None:
+            profil.disable()
+            os.makedirs(DOSSIER_PROFILS, exist_ok=True)
+            nom = re.sub(r'[^\w.-]+', '_', (request.get_json(silent=True) or {}).get('output', 'inconnu'))[:80]
+            profil.dump_stats(os.path.join(DOSSIER_PROFILS, f"{nom}-{time.time_ns()}.prof"))
+        if request.path.endswith('/_dash-update-component'):
+            mesures.fin_requete(reponse.calculate_content_length() or 0)
+        return reponse
+
+    @app.server.route('/metriques')
+    def metriques():
+        # Format Prometheus par défaut, JSON avec ?format=json
+        if request.args.get('format') == 'json':
+            return jsonify(mesures.json(cache_rendu))
+        return Response(mesures.prometheus(cache_rendu), mimetype='text/plain; version=0.0.4')
 
 app.layout = html.Div([
 
     html.H1("Diversité et inclusion en entreprise : analyse de l'évolution du bilan social d'EDF SA", style={'text-align': 'center', 'margin-top': '20px'}),
     html.H1("sous l'angle des disparités de genre", style={'text-align': 'center'}),
     html.Img(
-        src="https://upload.wikimedia.org/wikipedia/commons/1/12/%C3%89lectricit%C3%A9_de_France_logo.svg",
+        src=url_ressource(ressources.LOGO_EDF),
         style={
             "height": "100px",  # Ajuste la hauteur
             "marginBottom": "50px",  # Espacement sous l'image
@@ -88,14 +763,66 @@ app.layout = html.Div([
                 selected_className='custom-tab--selected'
             ),
         ]),
-    html.Div(id='tabs-content-classes')
+    html.Div(id='tabs-content-classes'),
+    # Carte du moteur "plotly" : montée une fois, sa géométrie n'est envoyée qu'à la première ouverture de l'onglet
+    *([html.Div(dcc.Graph(id='carte-plotly', figure={}), id='conteneur-carte-plotly', style={'display': 'none'}),
+       dcc.Store(id='carte-chargee', data=False)]
+      if MOTEUR_CARTE == "plotly" else []),
+    # Données des onglets filtrés côté navigateur, envoyées une seule fois par session
+    dcc.Store(id='donnees-client', data={})
 ])
 
+onglets = [onglet.value for onglet in app.layout['tabs-with-classes'].children]
+
+def conteneur_graphiques(numero, largeurs):
+    # Graphiques montés une fois avec l'onglet, dont les listes déroulantes ne changent ensuite que les données :
+    # dans le navigateur (callback clientside) ou par mise à jour partielle envoyée par le serveur (Patch)
+    style = {'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'}
+    if not FILTRAGE_CLIENT:
+        gabarits = donnees_client(f'tab-{numero}')['gabarits']
+        return html.Div([
+            html.Div(dcc.Graph(id=f'graph-serveur_{numero}_{i}', figure=gabarit), style={'width': largeur})
+            for i, (gabarit, largeur) in enumerate(zip(gabarits, largeurs))
+        ], id=f'graphs-container_{numero}', style=style)
+    return html.Div([
+        html.Div(dcc.Graph(id=f'graph-client_{numero}_{i}'), style={'width': largeur})
+        for i, largeur in enumerate(largeurs)
+    ], id=f'graphs-client_{numero}', style=style)
+
+# Clés des traces remplacées par les mises à jour partielles (le reste de la figure est inchangé)
+CLES_DONNEES_TRACE = ['x', 'y', 'ids', 'labels', 'parents', 'values', 'customdata', 'text']
+
+def patch_figure(figure, gabarit):
+    # Mise à jour partielle d'un graphique affiché avec `gabarit` : données des traces (associées par nom) et titre
+    figure = json.loads(figure.to_json())
+    noms = [trace.get('name') for trace in gabarit['data']]
+    traces = {trace.get('name'): trace for trace in figure['data']}
+    if len(traces) != len(figure['data']) or not set(traces) <= set(noms):
+        return figure  # traces différentes du gabarit : figure complète
+    patch = Patch()
+    patch['layout']['title']['text'] = figure['layout']['title']['text']
+    for i, (nom, affichee) in enumerate(zip(noms, gabarit['data'])):
+        trace = traces.get(nom, {})
+        for cle in CLES_DONNEES_TRACE:
+            if cle in trace or cle in affichee:
+                patch['data'][i][cle] = tableau_type(trace.get(cle, [])) if ALLEGER_FIGURES else trace.get(cle, [])
+        if 'colors' in affichee.get('marker', {}):
+            patch['data'][i]['marker']['colors'] = trace.get('marker', {}).get('colors', [])
+    if 'frames' in figure:
+        patch['frames'] = figure['frames']
+    return patch
+
 @callback(Output('tabs-content-classes', 'children'),
               Input('tabs-with-classes', 'value'))
 
+# Les onglets sans liste déroulante (0 et 3) sont rendus ici avec leurs graphiques :
+# leur calcul n'a lieu qu'à l'affichage de l'onglet, puis est servi par le cache de rendu
+@cache_rendu.memoriser('onglets', sources=["data/salaire_effectifs.csv", "data/formation_evo.csv", "data/temps_partiel_final.csv",
+                                           "data/alternance.csv"],
+                       domaine=lambda: onglets)
 def render_content(tab):
     if tab == 'tab-1':
+        colleges = modalites("salaire_effectifs", "Collège")
         return html.Div([
         html.H2("Disparité des effectifs et des salaires femmes-hommes", style={'text-align': 'center'}),
         html.P("Sélectionnez une catégorie socio-professionnelle :", style={"fontSize": "16px", "fontWeight": "lighter", "marginBottom": "5px"}),
@@ -105,10 +832,11 @@ def render_content(tab):
             value=colleges[0],  # Valeur par défaut
             placeholder="Sélectionnez une catégorie socio-professionnelle"
         ),
-        html.Div(id='graphs-container_1', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
+        conteneur_graphiques(1, ['60%', '40%'])
     ], style={'padding': '20px', 'border-bottom': '2px solid #ccc'})
 
     elif tab == 'tab-2':
+        evolutions = modalites("formation_evo", "Evolution")
         return html.Div([
         html.H2("Évolution des formations", style={'text-align': 'center'}),
         html.P("Sélectionnez une évolution :", style={"fontSize": "16px", "fontWeight": "lighter", "marginBottom": "5px"}),
@@ -118,16 +846,17 @@ def render_content(tab):
             value=evolutions[0],  # Valeur par défaut
             placeholder="Sélectionnez une évolution"
         ),
-        html.Div(id='graphs-container_2', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
+        conteneur_graphiques(2, ['48%', '48%'])
     ], style={'padding': '20px', 'border-bottom': '2px solid #ccc'})
     
     elif tab == 'tab-3':
         return html.Div([
         html.H2("Évolution des contrats d'alternance", style={'text-align': 'center'}),
-        html.Div(id='graphs-container_3', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
+        html.Div(display_alternance_graphs(tab), id='graphs-container_3', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
     ], style={'padding': '20px'})
 
     elif tab == 'tab-5':
+        colleges_df5 = modalites("temps_partiel_final", "Collège")
         return html.Div([
         html.H2("Proportion en temps-partiel par genre", style={'text-align': 'center'}),
         html.P("Sélectionnez une catégorie socio-professionnelle :", style={"fontSize": "16px", "fontWeight": "lighter", "marginBottom": "5px"}),
@@ -137,7 +866,7 @@ def render_content(tab):
             value=colleges_df5[0],  # Valeur par défaut
             placeholder="Sélectionnez une catégorie socio-professionnelle"
         ),
-        html.Div(id='graphs-container_5', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
+        conteneur_graphiques(5, ['48%', '48%'])
     ], style={'padding': '20px', 'border-bottom': '2px solid #ccc'})
 
     elif tab == 'tab-6':
@@ -150,26 +879,46 @@ def render_content(tab):
             value=indicateur_df6[0],  # Valeur par défaut
             placeholder="Sélectionnez un indicateur"
         ),
-        html.Div(id='graphs-container_6', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
+        # Moteur "plotly" : le graphique de la carte est dans app.layout, affiché sous cet onglet
+        *([html.Div(mise_en_page_carte(indicateur_df6[0], None), style={'margin-top': '20px'})]
+          if MOTEUR_CARTE == "plotly" else
+          [html.Progress(id='progression_6', value='0', max='3', style={'display': 'none', 'width': '100%', 'margin-top': '20px'}),
+           dcc.Store(id='demande_6'),
+           html.Div(id='graphs-container_6', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})])
     ], style={'padding': '20px', 'border-bottom': '2px solid #ccc'})
 
     elif tab == 'tab-0':
         return html.Div([
         html.H2("Tableau de bord de l'évolution par genre chez EDF SA", style={'text-align': 'center'}),
         html.P("(Les écarts en rouges montrent une augmentation des disparités entre femmes et hommes)", style={"fontSize": "14px", "fontWeight": "lighter", "marginBottom": "5px", "textAlign": "center"}),        
-        html.Div(id='graphs-container_7', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
+        html.Div(tableau_de_bord(tab), id='graphs-container_7', style={'display': 'flex', 'justify-content': 'space-around', 'margin-top': '20px'})
     ], style={'padding': '20px'})
 
 
-@app.callback(
-        Output('graphs-container_1', 'children'),
-        Input('effectifs-dropdown', 'value')
+# 📌 Modèle de mise en page des figures : reprend du modèle "plotly" les seuls réglages utilisés ici
+# (le modèle complet, ~7 Ko, était répété dans chaque figure envoyée au navigateur) ; ALLEGER_FIGURES=0 garde "plotly"
+modele_plotly = pio.templates['plotly']
+pio.templates['bilan_social'] = go.layout.Template(
+    layout={cle: modele_plotly.layout[cle] for cle in
+            ['autotypenumbers', 'colorway', 'font', 'hovermode', 'hoverlabel', 'paper_bgcolor',
+             'plot_bgcolor', 'xaxis', 'yaxis', 'geo', 'title']},
+    data={'bar': [go.Bar(marker_line=modele_plotly.data.bar[0].marker.line)],
+          'choropleth': [go.Choropleth(colorbar=modele_plotly.data.choropleth[0].colorbar)]},
 )
+if ALLEGER_FIGURES:
+    pio.templates.default = 'bilan_social'
+
+# Couleurs des genres, communes à tous les graphiques
+COULEURS_GENRE = {
+    'Homme': '#1b909a',  # Bleu
+    'Femme': '#7900f1',  # Rose
+}
 
 # Graphique Tab 1 : Disparité des effectifs femmes-hommes
-def update_graphs(selected_csp):
+@mesures.phase('figure')
+def figures_effectifs(selected_csp):
 
-    filtered_df1 = df1[df1["Collège"] == selected_csp]
+    filtered_df1 = tranche("salaire_effectifs", selected_csp)
 
     fig_effectifs = px.bar(
         filtered_df1,
@@ -180,10 +929,7 @@ def update_graphs(selected_csp):
         barmode="group",
         text_auto='.2s',
         labels={'Nombre de salariés':'Nombre d\'employés', 'Année':'Année'},
-        color_discrete_map={
-            'Homme': '#1b909a',  # Bleu
-            'Femme': '#7900f1',  # Rose
-        }
+        color_discrete_map=COULEURS_GENRE
     )
     fig_effectifs.update_traces(
         hovertemplate="<b>Année :</b> %{x}<br><b>Nombre de salariés :</b> %{y:.0f}")
@@ -195,29 +941,34 @@ def update_graphs(selected_csp):
         color="Genre",
         title=f"Évolution de la rémuneration moyenne - {selected_csp}",
         markers=True,
-        color_discrete_map={
-            'Homme': '#1b909a',  # Bleu
-            'Femme': '#7900f1',  # Rose
-        }
+        color_discrete_map=COULEURS_GENRE
     )
     fig_salaires.update_traces(
         hovertemplate="<br><b>Année :</b> %{x}<br><b>Salaire mensuel moyen brut :</b> %{y:.2f}€")
     
     fig_salaires.update_layout(yaxis_range=[0, 8000], hovermode = "x unified")
 
-    return [
-        html.Div(dcc.Graph(figure=fig_effectifs), style={'width': '60%'}),
-        html.Div(dcc.Graph(figure=fig_salaires), style={'width': '40%'})
-    ]
+    return fig_effectifs, fig_salaires
 
 @app.callback(
-    Output('graphs-container_2', 'children'),
-    Input('evolution-dropdown', 'value')
+        Output('graph-serveur_1_0', 'figure'),
+        Output('graph-serveur_1_1', 'figure'),
+        Input('effectifs-dropdown', 'value'),
+        prevent_initial_call=True
 )
 
-def update_graphs(selected_evolution):
+@cache_rendu.memoriser('effectifs', sources=["data/salaire_effectifs.csv"], domaine=lambda: modalites("salaire_effectifs", "Collège"))
+def update_graphs(selected_csp):
+    fig_effectifs, fig_salaires = figures_effectifs(selected_csp)
+    gabarit_effectifs, gabarit_salaires = donnees_client('tab-1')['gabarits']
+
+    return [patch_figure(fig_effectifs, gabarit_effectifs), patch_figure(fig_salaires, gabarit_salaires)]
+
+# Graphique Tab 2 : Formations et évolutions
+@mesures.phase('figure')
+def figures_evolutions(selected_evolution):
     # Filtrer les données en fonction de l'évolution sélectionnée
-    filtered_df2 = df2[df2["Evolution"] == selected_evolution]
+    filtered_df2 = tranche("formation_evo", selected_evolution)
 
     # Extraire les collèges uniques pour le titre
     college_df2 = filtered_df2["Collège"].unique()
@@ -228,13 +979,10 @@ def update_graphs(selected_evolution):
         x='Année',
         y="Proportion d'employés formés (%)",
         color='Genre',
-        title=f"Population formée - {college_df2}",
+        title=f"Population formée - {', '.join(college_df2)}",
         labels={'Valeur': 'Valeur', 'Année': 'Année'},
         markers=True,
-        color_discrete_map={
-            'Homme': '#1b909a',  # Bleu
-            'Femme': '#7900f1',  # Rose
-        }
+        color_discrete_map=COULEURS_GENRE
     )
     fig_population_formee.update_traces(
         hovertemplate="<br><b>Année :</b> %{x}<br><b>Proportion d'employés formés :</b> %{y:.2f}%")
@@ -247,10 +995,7 @@ def update_graphs(selected_evolution):
         title=f"Evolutions - {selected_evolution}",
         labels={'Valeur': 'Valeur', 'Année': 'Année'},
         markers=True,
-        color_discrete_map={
-            'Homme': '#1b909a',  # Bleu
-            'Femme': '#7900f1',  # Rose
-        }
+        color_discrete_map=COULEURS_GENRE
     )
     fig_nombre_evolutions.update_traces(
         hovertemplate="<br><b>Année :</b> %{x}<br><b>Proportion d'évolutions :</b> %{y:.2f}%")
@@ -258,20 +1003,30 @@ def update_graphs(selected_evolution):
     fig_population_formee.update_layout(yaxis_range=[0, 40], hovermode = "x unified")
     fig_nombre_evolutions.update_layout(yaxis_range=[0, 40], hovermode = "x unified")
 
-    # Retourner les graphiques dans des divs côte à côte
-    return [
-        html.Div(dcc.Graph(figure=fig_population_formee), style={'width': '48%'}),
-        html.Div(dcc.Graph(figure=fig_nombre_evolutions), style={'width': '48%'})
-    ]
+    return fig_population_formee, fig_nombre_evolutions
 
 @app.callback(
-    Output('graphs-container_3', 'children'),
-    Input('tabs-with-classes', 'value')
+    Output('graph-serveur_2_0', 'figure'),
+    Output('graph-serveur_2_1', 'figure'),
+    Input('evolution-dropdown', 'value'),
+    prevent_initial_call=True
 )
 
+@cache_rendu.memoriser('evolutions', sources=["data/formation_evo.csv"], domaine=lambda: modalites("formation_evo", "Evolution"))
+def update_graphs(selected_evolution):
+    fig_population_formee, fig_nombre_evolutions = figures_evolutions(selected_evolution)
+    gabarit_population_formee, gabarit_nombre_evolutions = donnees_client('tab-2')['gabarits']
+
+    # Seules les données et les titres des graphiques affichés sont envoyés
+    return [patch_figure(fig_population_formee, gabarit_population_formee),
+            patch_figure(fig_nombre_evolutions, gabarit_nombre_evolutions)]
+
+# Graphiques Tab 3 : contrats d'alternance (insérés par render_content)
+@cache_rendu.memoriser('alternance', sources=["data/alternance.csv"], domaine=lambda: ['tab-3'])
+@mesures.phase('figure')
 def display_alternance_graphs(_):
-    df3_apprentissage = df3[df3["Indicateur"] == "Contrats d'apprentissage conclus dans l'année"]
-    df3_pro = df3[df3["Indicateur"] == "Contrats de professionnalisation conclus dans l'année"]
+    df3_apprentissage = tranche("alternance", "Contrats d'apprentissage conclus dans l'année")
+    df3_pro = tranche("alternance", "Contrats de professionnalisation conclus dans l'année")
 
     fig_apprentissage = px.line(
         df3_apprentissage,
@@ -280,10 +1035,7 @@ def display_alternance_graphs(_):
         color="Genre",
         title="Évolution du nombre de contrats d'apprentissages",
         markers=True,
-        color_discrete_map={
-            'Homme': '#1b909a',  # Bleu
-            'Femme': '#7900f1',  # Rose
-        }
+        color_discrete_map=COULEURS_GENRE
     )
     fig_apprentissage.update_traces(
         hovertemplate="<br><b>Année :</b> %{x}<br><b>Nombre de contrats :</b> %{y:.0f}")
@@ -295,10 +1047,7 @@ def display_alternance_graphs(_):
         color="Genre",
         title="Évolution du nombre de contrats de professionnalisation",
         markers=True,
-        color_discrete_map={
-            'Homme': '#1b909a',  # Bleu
-            'Femme': '#7900f1',  # Rose
-        }
+        color_discrete_map=COULEURS_GENRE
     )
     fig_professionnalisation.update_traces(
         hovertemplate="<br><b>Année :</b> %{x}<br><b>Nombre de contrats :</b> %{y:.0f}")
@@ -312,50 +1061,84 @@ def display_alternance_graphs(_):
     ]
 
 
+# 📌 Animation par année : une image (frame plotly) par année, calculées à l'avance et envoyées avec la figure ;
+# le curseur et le bouton de lecture passent d'une image à l'autre dans le navigateur, sans appel au serveur
+def animer_par_annee(figure, images, annee):
+    # images : [{'name': année, 'data': [traces], 'layout': {...}}] dans l'ordre des années ; `annee` : image affichée
+    noms = [image['name'] for image in images]
+    image = images[noms.index(str(annee))]
+    for trace, donnees in zip(figure.data, image['data']):
+        trace.update({cle: valeur for cle, valeur in donnees.items() if cle != 'type'})
+    figure.frames = images
+    figure.update_layout(
+        image['layout'],
+        sliders=[{
+            'active': noms.index(str(annee)),
+            'currentvalue': {'prefix': 'Année : '},
+            'pad': {'t': 20},
+            'steps': [{'label': nom, 'method': 'animate',
+                       'args': [[nom], {'mode': 'immediate', 'frame': {'duration': 0, 'redraw': True}, 'transition': {'duration': 0}}]}
+                      for nom in noms],
+        }],
+        updatemenus=[{
+            'type': 'buttons', 'showactive': False, 'x': 0, 'y': 0, 'xanchor': 'right', 'yanchor': 'top', 'pad': {'t': 20, 'r': 10},
+            'buttons': [{'label': '▶', 'method': 'animate',
+                         'args': [None, {'frame': {'duration': 800, 'redraw': True}, 'transition': {'duration': 0}, 'fromcurrent': True}]}],
+        }],
+    )
+    return figure
+
+# Graphique Tab 5 : Proportion en temps partiel (treemaps animés par année, première et dernière année au chargement)
+def titre_temps_partiel(annee, selected_csp):
+    return f"Proportion d'employés en temps partiel par genre en {annee} - {selected_csp}"
+
+@par_version("temps_partiel_final")
+def images_temps_partiel():
+    # Treemaps Genre > Metrique de chaque (Collège, Année) calculés en une passe : feuilles et totaux par genre
+    df = jeu("temps_partiel_final")
+    feuilles = pd.DataFrame({
+        'Collège': df["Collège"], 'Année': df["Année"], 'Genre': df["Genre"],
+        'ids': df["Genre"] + "/" + df["Metrique"], 'labels': df["Metrique"], 'parents': df["Genre"],
+        'values': df["Valeur"].round(2),
+    })
+    racines = feuilles.groupby(["Collège", "Année", "Genre"], sort=False, as_index=False)["values"].sum()
+    racines = racines.assign(ids=racines["Genre"], labels=racines["Genre"], parents="")
+    noeuds = pd.concat([feuilles, racines], ignore_index=True)
+    noeuds["couleurs"] = noeuds["Genre"].map(COULEURS_GENRE)
+    images = {}
+    for (selected_csp, annee), groupe in noeuds.groupby(["Collège", "Année"], sort=True):
+        images.setdefault(selected_csp, []).append({
+            'name': str(annee),
+            'data': [{'type': 'treemap', 'ids': groupe["ids"].tolist(), 'labels': groupe["labels"].tolist(),
+                      'parents': groupe["parents"].tolist(), 'values': groupe["values"].round(2).tolist(),
+                      'marker': {'colors': groupe["couleurs"].tolist()}}],
+            'layout': {'title': {'text': titre_temps_partiel(annee, selected_csp)}},
+        })
+    return images
+
+@mesures.phase('figure')
+def figures_temps_partiel(selected_csp):
+    images = images_temps_partiel()[selected_csp]
+    figures = []
+    for image in (images[0], images[-1]):
+        figure = go.Figure(go.Treemap(branchvalues="total", hovertemplate="%{label} : %{value:.0f} %"))
+        figures.append(animer_par_annee(figure, images, image['name']))
+    return figures
+
 @app.callback(
-    Output('graphs-container_5', 'children'),
-    Input('temps_partiel-dropdown', 'value')
+    Output('graph-serveur_5_0', 'figure'),
+    Output('graph-serveur_5_1', 'figure'),
+    Input('temps_partiel-dropdown', 'value'),
+    prevent_initial_call=True
 )
 
+@cache_rendu.memoriser('temps_partiel', sources=["data/temps_partiel_final.csv"], domaine=lambda: modalites("temps_partiel_final", "Collège"))
 def update_temps_partiel_graphs(selected_csp):
+    mosaicplot_debut, mosaicplot_fin = figures_temps_partiel(selected_csp)
+    gabarit_debut, gabarit_fin = donnees_client('tab-5')['gabarits']
 
-    filtered_df5 = df5[df5["Collège"] == selected_csp].round(2)
-
-    # Créer les graphiques
-    mosaicplot_2017 = px.treemap(
-        filtered_df5[filtered_df5["Année"] == 2017],
-        path=["Genre", "Metrique"],
-        values="Valeur",
-        color="Genre",
-        title=f"Proportion d'employés en temps partiel par genre en 2017 - {selected_csp}",
-        labels={'Valeur': 'Valeur', 'Année': 'Année'},
-        color_discrete_map={
-            'Homme': '#1b909a',
-            'Femme': '#7900f1',
-        }
-    )
-    mosaicplot_2017.update_traces(
-        hovertemplate="%{label} : %{value:.0f} %")
-    
-    mosaicplot_2023 = px.treemap(
-        filtered_df5[filtered_df5["Année"] == 2023],
-        path=["Genre", "Metrique"],
-        values="Valeur",
-        color="Genre",
-        title=f"Proportion d'employés en temps partiel par genre en 2023 - {selected_csp}",
-        labels={'Valeur': 'Valeur', 'Année': 'Année'},
-        color_discrete_map={
-            'Homme': '#1b909a',
-            'Femme': '#7900f1',
-        },
-    )
-    mosaicplot_2023.update_traces(
-        hovertemplate="%{label} : %{value:.0f} %")
-    # Retourner les graphiques dans des divs côte à côte
-    return [
-        html.Div(dcc.Graph(figure=mosaicplot_2017), style={'width': '48%'}),
-        html.Div(dcc.Graph(figure=mosaicplot_2023), style={'width': '48%'})
-    ]
+    # Seules les données, les images par année et les titres des graphiques affichés sont envoyés
+    return [patch_figure(mosaicplot_debut, gabarit_debut), patch_figure(mosaicplot_fin, gabarit_fin)]
 
 indicateur_links = {
     "Note Ecart rémunération": "https://egapro.travail.gouv.fr/aide-index#indicateur-ecart-de-remuneration",
@@ -367,21 +1150,176 @@ indicateur_links = {
     "Note Index": "https://www.index-egapro.travail.gouv.fr/"
 }
 
-@app.callback(
-    Output('graphs-container_6', 'children'),
-    Input('indicateur-dropdown', 'value')
-)
+# Cartes publiées en fichiers statiques nommés d'après leur contenu, servis avec cache navigateur
+DOSSIER_CARTES = os.environ.get("DOSSIER_CARTES", "artefacts/cartes")
+DUREE_CACHE_CARTES = 365 * 24 * 3600  # en secondes, le nom change avec le contenu
+
+def publier_carte(carte):
+    # Écrit le HTML de la carte sous un nom dérivé de son contenu et renvoie son URL
+    map_html = ressources.reecrire(inserer_geometrie(carte.get_root().render()), {url: url_ressource(url) for url in manifeste_ressources})
+    # Identifiants aléatoires de folium remplacés par des identifiants stables : même carte, même fichier
+    identifiants = {}
+    map_html = re.sub(r'[0-9a-f]{32}', lambda m: identifiants.setdefault(m.group(0), f"{len(identifiants):032x}"), map_html)
+    empreinte = hashlib.sha256(map_html.encode()).hexdigest()[:20]
+    chemin = os.path.join(DOSSIER_CARTES, f"{empreinte}.html")
+    if not os.path.exists(chemin):
+        os.makedirs(DOSSIER_CARTES, exist_ok=True)
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            f.write(map_html)
+        os.replace(temporaire, chemin)
+    return app.get_relative_path(f"/cartes/{empreinte}.html")
+
+@app.server.route('/cartes/<nom>')
+def servir_carte(nom):
+    reponse = send_from_directory(os.path.abspath(DOSSIER_CARTES), nom,
+                                  etag=nom.split('.')[0], max_age=DUREE_CACHE_CARTES)
+    reponse.cache_control.public = True
+    reponse.cache_control.immutable = True
+    return reponse
+
+@cache_rendu.memoriser('carte', sources=SOURCES_CARTE,
+                       domaine=lambda: indicateur_df6 if MOTEUR_CARTE == "folium" else [])
 def update_output(selected_indicateur_df6):
     return update_map(selected_indicateur_df6)
 
+def rendu_partage(cle, rendre):
+    # Un seul processus rend une clé donnée : les requêtes identiques en cours attendent son résultat sur disque
+    verrou = f"{cle}:verrou"
+    while True:
+        sortie = cache_disque.get(cle)
+        if sortie is not None:
+            return sortie
+        if cache_disque.add(verrou, os.getpid()):
+            try:
+                sortie = rendre()
+                cache_disque.set(cle, sortie, expire=DUREE_CACHE_ARRIERE_PLAN)
+                return sortie
+            finally:
+                cache_disque.delete(verrou)
+        # Processus du rendu arrêté (requête annulée) : le verrou est libéré pour le suivant
+        detenteur = cache_disque.get(verrou)
+        if detenteur is not None and not psutil.pid_exists(detenteur):
+            cache_disque.delete(verrou)
+        time.sleep(0.05)
+
+def cle_partagee(nom, valeur):
+    # Clé d'un rendu partagé sur disque : par valeur et par version des fichiers lus
+    signatures = [etat_jeu(nom_jeu).signature for nom_jeu, (source, _) in jeux_donnees.items()
+                  if source in cache_rendu.sources[nom]]
+    return f"{nom}:{hashlib.sha1(json.dumps([valeur, signatures]).encode()).hexdigest()}"
+
+# Intervalle d'interrogation du serveur pendant un rendu en arrière-plan (1000 ms par défaut dans Dash)
+INTERVALLE_ARRIERE_PLAN = int(os.environ.get("INTERVALLE_ARRIERE_PLAN", "100"))  # en millisecondes
+
+def callback_arriere_plan(nom, sortie, entree, progression, demande):
+    # Enregistre le callback en cache `nom` : réponse immédiate si le rendu est déjà en cache (mémoire
+    # ou disque), sinon rendu en arrière-plan (ou normalement sans gestionnaire)
+    # `progression` : identifiant d'un html.Progress affiché pendant le rendu (étapes sur 3)
+    # `demande` : identifiant d'un dcc.Store qui transmet les valeurs à rendre au callback d'arrière-plan
+    fonction = cache_rendu.fonctions[nom]
+    if gestionnaire_arriere_plan is None:
+        app.callback(sortie, entree)(fonction)
+        return
+    sources_arriere_plan.update(cache_rendu.sources[nom])
+
+    @app.callback(sortie, Output(demande, 'data'), entree)
+    def rendu_direct(valeur):
+        cache_rendu.verifier_sources()
+        trouve, resultat = cache_rendu.lire((nom, valeur))
+        if not trouve:
+            resultat = cache_disque.get(cle_partagee(nom, valeur))
+        if resultat is None:
+            # Instant joint à la valeur : une nouvelle demande de la même valeur relance le rendu
+            return no_update, {'valeur': valeur, 'instant': time.time()}
+        return resultat, no_update
+
+    @app.callback(
+        Output(sortie.component_id, sortie.component_property, allow_duplicate=True),
+        Input(demande, 'data'),
+        background=True,
+        interval=INTERVALLE_ARRIERE_PLAN,
+        prevent_initial_call=True,
+        cancel=[entree],
+        progress=[Output(progression, 'value'), Output(progression, 'max')],
+        running=[(Output(progression, 'style'), {'display': 'block', 'width': '100%', 'margin-top': '20px'}, {'display': 'none'})],
+    )
+    def rendu_arriere_plan(set_progress, demande_rendu):
+        # Processus séparé : les rendus sont partagés sur disque, par valeur et par version des fichiers lus
+        set_progress(('1', '3'))
+        valeur = demande_rendu['valeur']
+
+        def rendre():
+            set_progress(('2', '3'))
+            return fonction(valeur)
+
+        resultat = rendu_partage(cle_partagee(nom, valeur), rendre)
+        set_progress(('3', '3'))
+        return resultat
+
+
+# Définition des coordonnées et valeur de l'indicateur pour une entreprise
+entreprise_data = {
+    "nom": "EDF SA",
+    "latitude": 48.8566,  # Paris
+    "longitude": 2.3522,
+    "Note Ecart rémunération":40,
+    "Note Ecart taux de promotion":15,
+    "Note Ecart taux d'augmentation (hors promotion)":"Non communiqué", 
+    "Note Ecart taux d'augmentation":20,
+    "Note Hautes rémunérations":5,
+    "Note Retour congé maternité":15,
+    "Note Index": 75
+}
+
+# Marqueurs des entreprises du fichier FICHIER_ENTREPRISES, regroupés par Leaflet.markercluster :
+# les points [latitude, longitude, nom, note] sont envoyés en un seul tableau, les marqueurs créés dans le navigateur
+MARQUEUR_ENTREPRISE = """function (ligne) {
+    var marqueur = L.circleMarker(new L.LatLng(ligne[0], ligne[1]), {radius: 5, color: '#001a70', weight: 1, fillOpacity: 0.6});
+    marqueur.bindTooltip('<b>' + ligne[2] + '</b><br>' + %s + ': ' + (ligne[3] === null ? 'Non communiqué' : ligne[3]));
+    return marqueur;
+}"""
+
+def notes_entreprises(indicateur):
+    # Notes d'un indicateur par entreprise, None si non numérique (non communiquée)
+    notes = pd.to_numeric(entreprises_placees()[indicateur], errors='coerce')
+    return [None if pd.isna(note) else note for note in notes.tolist()]
+
+def marqueurs_entreprises(indicateur):
+    entreprises = entreprises_placees()
+    return FastMarkerCluster(
+        [
+            [latitude, longitude, str(escape(nom)), note]
+            for latitude, longitude, nom, note in zip(entreprises["latitude"].round(5), entreprises["longitude"].round(5),
+                                                      entreprises["nom"], notes_entreprises(indicateur))
+        ],
+        callback=MARQUEUR_ENTREPRISE % json.dumps(str(escape(indicateur))),
+        name="Entreprises",
+    )
+
+@mesures.phase('folium')
 def update_map(selected_indicateur_df6):
+    # Publier le code HTML de la carte en fichier statique
+    url_carte = publier_carte(carte_folium(selected_indicateur_df6))
+
+    return mise_en_page_carte(selected_indicateur_df6,
+                              html.Iframe(src=url_carte, width='1200', height='700', style={'center': '0'}))
+
+def carte_folium(selected_indicateur_df6):
     # Créer la carte centrée sur la France
     m = folium.Map(location=[46.157880, 2.488444], zoom_start=6)
-    
-    # Créer la choroplèthe en utilisant votre GeoDataFrame (converti en GeoJSON)
-    folium.Choropleth(
-        geo_data=gdf1.to_json(),  # convertir en JSON
-        data=gdf1,
+
+    # Géométrie en cache + valeurs de l'indicateur, partagée par les deux couches
+    if ENCODAGE_GEOMETRIE == "topojson":
+        regions_geojson = topojson_indicateur(selected_indicateur_df6)
+    else:
+        regions_geojson = geojson_indicateur(selected_indicateur_df6)
+
+    # Créer la choroplèthe à partir de la géométrie en cache
+    choroplethe = folium.Choropleth(
+        geo_data=regions_geojson,
+        topojson='objects.regions' if ENCODAGE_GEOMETRIE == "topojson" else None,
+        data=scores_regions(),
         columns=["Région", selected_indicateur_df6],
         key_on="feature.properties.Région",
         fill_color="YlGn",
@@ -390,21 +1328,9 @@ def update_map(selected_indicateur_df6):
         legend_name=selected_indicateur_df6,
     ).add_to(m)
 
-        # Définition des coordonnées et valeur de l'indicateur pour une entreprise
-    entreprise_data = {
-        "nom": "EDF SA",
-        "latitude": 48.8566,  # Paris
-        "longitude": 2.3522,
-        "Note Ecart rémunération":40,
-        "Note Ecart taux de promotion":15,
-        "Note Ecart taux d'augmentation (hors promotion)":"Non communiqué", 
-        "Note Ecart taux d'augmentation":20,
-        "Note Hautes rémunérations":5,
-        "Note Retour congé maternité":15,
-        "Note Index": 75
-    }
 
-    logo_url = "https://upload.wikimedia.org/wikipedia/commons/1/12/%C3%89lectricit%C3%A9_de_France_logo.svg"
+    # URL d'origine (folium lirait un chemin local comme un fichier) : remplacée à la publication de la carte
+    logo_url = ressources.LOGO_EDF
     icon = CustomIcon(
     logo_url,
     icon_size=(40, 40)  # Ajuste la taille du logo
@@ -415,6 +1341,8 @@ def update_map(selected_indicateur_df6):
         tooltip=f"{entreprise_data['nom']} - {selected_indicateur_df6}: {entreprise_data[selected_indicateur_df6]}",
         icon=icon
     ).add_to(m)
+    if "entreprises" in jeux_donnees:
+        marqueurs_entreprises(selected_indicateur_df6).add_to(m)
     # Optionnel : ajouter les labels pour chaque région
     style_function = lambda x: {
         'fillColor': '#ffffff',
@@ -425,20 +1353,29 @@ def update_map(selected_indicateur_df6):
     
     highlight_function = lambda x: {'fillColor': '#000000', 'color': '#000000', 'fillOpacity': 0.50, 'weight': 0.1}
     
-    folium.GeoJson(
-        gdf1.to_json(),
-        style_function=style_function,
-        highlight_function=highlight_function,
-        tooltip=folium.features.GeoJsonTooltip(
-            fields=["Région", selected_indicateur_df6],
-            aliases=["Région:", f"{selected_indicateur_df6}:"],
-            localize=True
-        )
-    ).add_to(m)
-    
-    # Récupérer le code HTML de la carte
-    map_html = m._repr_html_()
+    tooltip = folium.features.GeoJsonTooltip(
+        fields=["Région", selected_indicateur_df6],
+        aliases=["Région:", f"{selected_indicateur_df6}:"],
+        localize=True
+    )
+
+    if ENCODAGE_GEOMETRIE == "topojson":
+        # Pas de surlignage en TopoJSON : l'infobulle est portée par la choroplèthe, géométrie envoyée une fois
+        choroplethe.geojson.add_child(tooltip)
+    else:
+        folium.GeoJson(
+            regions_geojson,
+            style_function=style_function,
+            highlight_function=highlight_function,
+            tooltip=tooltip
+        ).add_to(m)
 
+    return m
+
+def titre_carte(indicateur):
+    return f"Indicateur selectionné : {indicateur} (Les scores régionaux correspondent aux moyennes des scores des entreprises dont le siège social se situe dans la région)"
+
+def mise_en_page_carte(selected_indicateur_df6, carte):
     # 📌 Sélecteur d'indicateur (Dropdown)
     dropdown = dbc.Select(
         id="select-indicateur",
@@ -453,7 +1390,7 @@ def update_map(selected_indicateur_df6):
     # 📌 Titre de la carte
     header_section = dbc.Row(
         dbc.Col(
-            html.H3(f"Indicateur selectionné : {selected_indicateur_df6} (Les scores régionaux correspondent aux moyennes des scores des entreprises dont le siège social se situe dans la région)", style={"textAlign": "center", "fontSize": "16px", "fontWeight": "lighter", "marginBottom": "20px"})
+            html.H3(titre_carte(selected_indicateur_df6), id='titre-carte', style={"textAlign": "center", "fontSize": "16px", "fontWeight": "lighter", "marginBottom": "20px"})
         )
     )
 
@@ -469,7 +1406,7 @@ def update_map(selected_indicateur_df6):
             ),
             header_section,
             dbc.Row(
-                dbc.Col(html.Iframe(srcDoc=map_html, width='1200', height='700', style={'center': '0'}))
+                dbc.Col(carte)
             )
         ],
         fluid=True
@@ -477,6 +1414,117 @@ def update_map(selected_indicateur_df6):
 
     return layout
 
+# Moteur "plotly" : choroplèthe et marqueur EDF SA dans un dcc.Graph
+@mesures.phase('filtrage')
+def valeurs_carte(indicateur):
+    valeurs = scores_regions().set_index('Région')[indicateur].reindex([region for region, _ in geometrie_regions()])
+    return [None if pd.isna(valeur) else valeur for valeur in valeurs.tolist()]
+
+def survol_carte(indicateur):
+    return f"<b>%{{location}}</b><br>{indicateur} : %{{z}}<extra></extra>"
+
+# Marqueurs groupés de la carte plotly (Scattergeo n'a pas de regroupement) : entreprises réunies
+# par case de PAS_GROUPES_CARTE degrés, un marqueur par case avec l'effectif et la note moyenne
+PAS_GROUPES_CARTE = float(os.environ.get("PAS_GROUPES_CARTE", "0.25"))
+
+@par_version("entreprises")
+def groupes_entreprises():
+    entreprises = jeu("entreprises")
+    return egapro.regrouper_entreprises(entreprises["longitude"].to_numpy(dtype=float),
+                                        entreprises["latitude"].to_numpy(dtype=float), PAS_GROUPES_CARTE)
+
+def notes_groupes(indicateur):
+    groupes, _, effectifs = groupes_entreprises()
+    notes = pd.to_numeric(jeu("entreprises")[indicateur], errors='coerce').to_numpy(dtype=float)
+    moyennes = egapro.moyennes_groupes(groupes, notes, len(effectifs)).round(2)
+    return [None if np.isnan(moyenne) else moyenne for moyenne in moyennes.tolist()]
+
+def survol_entreprises(indicateur):
+    return f"<b>%{{text}} entreprise(s)</b><br>{indicateur} (moyenne) : %{{customdata}}<extra></extra>"
+
+def texte_entreprise(indicateur):
+    return f"<b>{entreprise_data['nom']}</b><br>{indicateur}: {entreprise_data[indicateur]}"
+
+@mesures.phase('figure')
+def figure_carte(indicateur):
+    regions = geometrie_regions()
+    fig = go.Figure(go.Choropleth(
+        geojson={'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'id': region, 'properties': {}, 'geometry': geometrie} for region, geometrie in regions
+        ]},
+        locations=[region for region, _ in regions],
+        z=valeurs_carte(indicateur),
+        colorscale="YlGn",
+        marker={'opacity': 0.7, 'line': {'width': 0.5, 'color': '#000000'}},
+        colorbar={'title': {'text': indicateur, 'side': 'top'}, 'orientation': 'h', 'y': -0.02},
+        hovertemplate=survol_carte(indicateur),
+    ))
+    fig.add_trace(go.Scattergeo(
+        lon=[entreprise_data["longitude"]],
+        lat=[entreprise_data["latitude"]],
+        mode="markers+text",
+        text=[entreprise_data["nom"]],
+        textposition="top center",
+        hovertext=[texte_entreprise(indicateur)],
+        hoverinfo="text",
+        marker={'size': 14, 'symbol': 'star', 'color': '#fe5815', 'line': {'width': 1, 'color': '#001a70'}},
+    ))
+    if "entreprises" in jeux_donnees:
+        _, centres, effectifs = groupes_entreprises()
+        fig.add_trace(go.Scattergeo(
+            lon=centres[:, 0].round(5).tolist(),
+            lat=centres[:, 1].round(5).tolist(),
+            mode="markers+text",
+            text=effectifs.tolist(),
+            textfont={'size': 9, 'color': '#ffffff'},
+            customdata=notes_groupes(indicateur),
+            hovertemplate=survol_entreprises(indicateur),
+            marker={'size': np.clip(8 + 3 * np.sqrt(effectifs), 8, 40).round(1).tolist(),
+                    'color': '#001a70', 'opacity': 0.6},
+        ))
+    fig.update_geos(fitbounds="locations", visible=False, projection_type="mercator")
+    fig.update_layout(height=700, margin=dict(l=0, r=0, t=0, b=0), showlegend=False)
+    return fig
+
+@cache_rendu.memoriser('carte_plotly', sources=SOURCES_CARTE,
+                       domaine=lambda: indicateur_df6 if MOTEUR_CARTE == "plotly" else [])
+def changer_indicateur_carte(selected_indicateur_df6):
+    # Seules les 13 valeurs, les survols et le titre changent : la géométrie reste dans le navigateur
+    patch = Patch()
+    patch['data'][0]['z'] = valeurs_carte(selected_indicateur_df6)
+    patch['data'][0]['hovertemplate'] = survol_carte(selected_indicateur_df6)
+    patch['data'][0]['colorbar']['title']['text'] = selected_indicateur_df6
+    patch['data'][1]['hovertext'] = [texte_entreprise(selected_indicateur_df6)]
+    if "entreprises" in jeux_donnees:
+        notes = notes_groupes(selected_indicateur_df6)
+        patch['data'][2]['customdata'] = tableau_type(notes) if ALLEGER_FIGURES else notes
+        patch['data'][2]['hovertemplate'] = survol_entreprises(selected_indicateur_df6)
+    return patch, titre_carte(selected_indicateur_df6)
+
+if MOTEUR_CARTE == "plotly":
+    @app.callback(
+        Output('carte-plotly', 'figure'),
+        Output('titre-carte', 'children'),
+        Output('carte-chargee', 'data'),
+        Input('indicateur-dropdown', 'value'),
+        State('carte-chargee', 'data')
+    )
+    def update_carte_plotly(selected_indicateur_df6, carte_chargee):
+        # Figure complète (avec la géométrie) une seule fois par session, puis mises à jour partielles
+        if not carte_chargee:
+            return serialiser(figure_carte(selected_indicateur_df6)), titre_carte(selected_indicateur_df6), True
+        patch, titre = changer_indicateur_carte(selected_indicateur_df6)
+        return patch, titre, no_update
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='bilan_social', function_name='afficher_carte'),
+        Output('conteneur-carte-plotly', 'style'),
+        Input('tabs-with-classes', 'value')
+    )
+else:
+    callback_arriere_plan('carte', Output('graphs-container_6', 'children'), Input('indicateur-dropdown', 'value'),
+                          'progression_6', 'demande_6')
+
 # 📌 Callback pour mettre à jour le lien de définition en fonction de l'indicateur sélectionné
 @app.callback(
     Output("definition-link", "children"),
@@ -495,122 +1543,77 @@ def update_link(selected_indicateur):
         )
     return ""
 
-@app.callback(
-    Output('graphs-container_7', 'children'),
-    Input('tabs-with-classes', 'value')
-)
+# Indicateurs du tableau de bord (Tab 0), calculés à partir des données
+# indicateur -> (jeu de données, colonne, colonne de pondération, agrégation par année et genre)
+indicateurs_kpi = {
+    'effectif': ("salaire_effectifs", "Nombre de salariés", None, "sum"),
+    'salaire': ("salaire_effectifs", "Salaire mensuel moyen (€, brut)", None, "mean"),
+    'formation': ("formation_evo", "Population formée", "Nombre de salariés", "ratio"),
+}
 
-def tableau_de_bord(_):
+def calculer_kpi(df, colonne, ponderation, agregation):
+    # Une ligne par année : Femme, Homme, Total et Ecart (en % de la valeur des hommes)
+    if agregation == "ratio":
+        sommes = df.groupby(["Année", "Genre"])[[colonne, ponderation]].sum()
+        par_genre = (sommes[colonne] / sommes[ponderation] * 100).unstack("Genre")
+        totaux = sommes.groupby(level="Année").sum()
+        total = totaux[colonne] / totaux[ponderation] * 100
+    else:
+        par_genre = df.groupby(["Année", "Genre"])[colonne].agg(agregation).unstack("Genre")
+        total = df.groupby("Année")[colonne].agg(agregation)
+    kpi = par_genre.assign(Total=total)
+    kpi["Ecart"] = (kpi["Femme"] - kpi["Homme"]) / kpi["Homme"] * 100
+    return kpi.sort_index().round(2)
 
-    # Créer la figure avec un grid de 6 lignes et 3 colonnes
-    fig_effectif = go.Figure()
-    
-    # Colonne 1 : Effectifs
-    fig_effectif.add_trace(go.Indicator(
-                value=243003,
-                title = {'text': "Effectif<br><span style='font-size:0.6em;color:gray'>Total</span>"},
-                delta={'reference': 248953, 'relative': True}, #'valueformat': '.2f'}, NE MARCHE PAS POUR ARRONDIR LE DELTA
-                mode="number+delta",
-                #value={'valueformat': '.2f'}, NE MARCHE PAS POUR ARRONDIR LE DELTA
-                domain={'x': [0.4, 0.6], 'y': [0.8, 1.0]}))
-    
-    fig_effectif.add_trace(go.Indicator(
-                value=70653,
-                title= {'text': "<br><span style='font-size:0.8em;color:#7900f1'>Femmes</span>"},
-                delta={'reference': 74691, 'relative': True},
-                mode="number+delta",
-                domain={'x': [0.1, 0.3], 'y': [0.4, 0.6]}))
-    
-    fig_effectif.add_trace(go.Indicator(
-                value=172350,
-                title= {'text': "<br><span style='font-size:0.8em;color:#1b909a'>Hommes</span>"},
-                delta={'reference': 174262, 'relative': True},
-                mode="number+delta",
-                domain={'x': [0.7, 0.9], 'y': [0.4, 0.6]}))
-    
-    fig_effectif.add_trace(go.Indicator(
-                value=-59,
-                number = {"suffix": "%"},
-                title= {'text': "<br><span style='font-size:0.6em;color:gray'>Ecart</span>"},
-                delta={'reference': -57.13, "suffix": "%"},
-                mode="number+delta",
-                domain={'x': [0.4, 0.6], 'y': [0.4, 0.6]}))
+@par_version("formation_evo", "salaire_effectifs")
+def kpi_tableau_de_bord():
+    # Jeux lus : ceux de indicateurs_kpi
+    return {nom: calculer_kpi(jeu(nom_jeu), *parametres) for nom, (nom_jeu, *parametres) in indicateurs_kpi.items()}
 
-    
-    # Colonne 2 : Salaires
-    fig_salaire = go.Figure()
-
-    fig_salaire.add_trace(go.Indicator(
-                value=5245,
-                number = {"suffix": "€"},
-                title = {'text': "Salaire moyen<br><span style='font-size:0.6em;color:gray'>Total</span>"},
-                delta={'reference': 4318.33, 'relative': True},
-                mode="number+delta",
-                domain={'x': [0.4, 0.6], 'y': [0.8, 1.0]}))
-    
-    fig_salaire.add_trace(go.Indicator(
-                value=4914.67,
-                number = {"suffix": "€"},
-                title= {'text': "<br><span style='font-size:0.8em;color:#7900f1'>Femmes</span>"},
-                delta={'reference': 4009.33, 'relative': True},
+def figure_kpi(kpi, titre, suffixe, relatif, sous_titre="Total"):
+    # Dernière année comparée à la première : total, femmes, hommes et écart
+    annee, reference = kpi.index.max(), kpi.index.min()
+    cases = [
+        ("Total", f"{titre}<br><span style='font-size:0.6em;color:gray'>{sous_titre}</span>", {'x': [0.4, 0.6], 'y': [0.8, 1.0]}),
+        ("Femme", "<br><span style='font-size:0.8em;color:#7900f1'>Femmes</span>", {'x': [0.1, 0.3], 'y': [0.4, 0.6]}),
+        ("Homme", "<br><span style='font-size:0.8em;color:#1b909a'>Hommes</span>", {'x': [0.7, 0.9], 'y': [0.4, 0.6]}),
+    ]
+    figure = go.Figure()
+    for colonne, texte, domaine in cases:
+        figure.add_trace(go.Indicator(
+                    value=kpi.at[annee, colonne],
+                    number={"suffix": suffixe},
+                    title={'text': texte},
+                    delta={'reference': kpi.at[reference, colonne], 'relative': True} if relatif
+                          else {'reference': kpi.at[reference, colonne], "suffix": "%"},
+                    mode="number+delta",
+                    domain=domaine))
+    figure.add_trace(go.Indicator(
+                value=kpi.at[annee, "Ecart"],
+                number={"suffix": "%"},
+                title={'text': "<br><span style='font-size:0.6em;color:gray'>Ecart</span>"},
+                delta={'reference': kpi.at[reference, "Ecart"], "suffix": "%"},
                 mode="number+delta",
-                domain={'x': [0.1, 0.3], 'y': [0.4, 0.6]}))
+                domain={'x': [0.4, 0.6], 'y': [0.4, 0.6]}))
+    figure.update_layout(margin=dict(l=0, r=0, t=100, b=0))
+    return figure
 
-    fig_salaire.add_trace(go.Indicator(
-                value=5575.33,
-                number = {"suffix": "€"},
-                title= {'text': "<br><span style='font-size:0.8em;color:#1b909a'>Hommes</span>"},
-                delta={'reference': 4627.33, 'relative': True},
-                mode="number+delta",
-                domain={'x': [0.7, 0.9], 'y': [0.4, 0.6]}))
+# Tableau de bord Tab 0 (inséré par render_content)
+@cache_rendu.memoriser('tableau_de_bord', sources=["data/salaire_effectifs.csv", "data/formation_evo.csv"],
+                       domaine=lambda: ['tab-0'])
+@mesures.phase('figure')
+def tableau_de_bord(_):
+    kpi = kpi_tableau_de_bord()
 
-    fig_salaire.add_trace(go.Indicator(
-                value=-11.84,
-                number = {"suffix": "%"},
-                title= {'text': "<br><span style='font-size:0.6em;color:gray'>Ecart</span>"},
-                delta={'reference': -13.35, "suffix": "%"},
-                mode="number+delta",
-                domain={'x': [0.4, 0.6], 'y': [0.4, 0.6]}))
-    
-    
-    # Colonne 3 : Formation
-    fig_formation = go.Figure()
-
-    fig_formation.add_trace(go.Indicator(
-                value=42.25,
-                number = {"suffix": "%"},
-                title = {'text': "Salariés formés<br><span style='font-size:0.6em;color:gray'>Total</span>"},
-                delta={'reference': 47.39, "suffix":"%"},
-                mode="number+delta",
-                domain={'x': [0.4, 0.6], 'y': [0.8, 1.0]}))
-    
-    fig_formation.add_trace(go.Indicator(
-                value = 38.34,
-                number = {"suffix": "%"},
-                title= {'text': "<br><span style='font-size:0.8em;color:#7900f1'>Femmes</span>"},
-                delta={'reference': 47.86, "suffix":"%"},
-                mode="number+delta",
-                domain={'x': [0.1, 0.3], 'y': [0.4, 0.6]}))
+    # Colonne 1 : Effectifs
+    fig_effectif = figure_kpi(kpi['effectif'], "Effectif", "", relatif=True)
 
-    fig_formation.add_trace(go.Indicator(
-                value=43.85,
-                number = {"suffix": "%"},
-                title= {'text': "<br><span style='font-size:0.8em;color:#1b909a'>Hommes</span>"},
-                delta={'reference': 47.2, "suffix":"%"},
-                mode="number+delta",
-                domain={'x': [0.7, 0.9], 'y': [0.4, 0.6]}))
+    # Colonne 2 : Salaires
+    fig_salaire = figure_kpi(kpi['salaire'], "Salaire moyen", "€", relatif=True)
 
-    fig_formation.add_trace(go.Indicator(
-                value=-12.56,
-                number = {"suffix": "%"},
-                title= {'text': "<br><span style='font-size:0.6em;color:gray'>Ecart</span>"},
-                delta={'reference': 1.39, "suffix": "%"},
-                mode="number+delta",
-                domain={'x': [0.4, 0.6], 'y': [0.4, 0.6]}))
-    
-    fig_effectif.update_layout(margin=dict(l=0, r=0, t=100, b=0))
-    fig_salaire.update_layout(margin=dict(l=0, r=0, t=100, b=0))
-    fig_formation.update_layout(margin=dict(l=0, r=0, t=100, b=0))
+    # Colonne 3 : Formation (collèges présents dans les données de formation)
+    colleges_formes = ', '.join(modalites("formation_evo", "Collège"))
+    fig_formation = figure_kpi(kpi['formation'], "Salariés formés", "%", relatif=False, sous_titre=f"Total ({colleges_formes})")
 
     return html.Div([
     # Conteneur pour l'effectif
@@ -657,6 +1660,543 @@ def tableau_de_bord(_):
     })
 
 
+# API de données en lecture seule : les tranches et agrégats tracés par les onglets, sans rendu de figure
+# GET /api/v1 (liste des vues), GET /api/v1/<vue>?<colonne>=<valeur>&format=json|csv|arrow
+TAILLE_CACHE_API = int(os.environ.get("TAILLE_CACHE_API", "256"))
+FORMATS_API = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+def colonnes_jeu(nom_jeu, colonnes):
+    return lambda: jeu(nom_jeu)[colonnes]
+
+def table_kpi(nom):
+    kpi = kpi_tableau_de_bord()[nom].reset_index()
+    kpi.columns.name = None
+    return kpi
+
+vues_api = {
+    # vue -> (jeux de données lus, table complète)
+    'effectifs': (["salaire_effectifs"], colonnes_jeu("salaire_effectifs", [
+        "Année", "Collège", "Genre", "Nombre de salariés", "Salaire mensuel moyen (€, brut)"])),
+    'formation': (["formation_evo"], colonnes_jeu("formation_evo", [
+        "Année", "Collège", "Genre", "Nombre de salariés", "Population formée", "Proportion d'employés formés (%)"])),
+    'evolutions': (["formation_evo"], colonnes_jeu("formation_evo", [
+        "Année", "Collège", "Genre", "Evolution", "Evolutions", "Proportion d'évolutions (%)"])),
+    'alternance': (["alternance"], colonnes_jeu("alternance", ["Année", "Indicateur", "Genre", "Nombre de contrats"])),
+    'temps_partiel': (["temps_partiel_final"], colonnes_jeu("temps_partiel_final", [
+        "Année", "Collège", "Genre", "Metrique", "Valeur"])),
+    'conges': (["absence_conge_matpat"], lambda: jeu("absence_conge_matpat").drop(columns="Unnamed: 0")),
+    'regions': (JEUX_CARTE, lambda: scores_regions()[["Région", *indicateur_df6]]),
+    # Agrégats du tableau de bord : une ligne par année (Femme, Homme, Total, Ecart en %)
+    **{f'kpi_{nom}': ([nom_jeu], functools.partial(table_kpi, nom)) for nom, (nom_jeu, *_) in indicateurs_kpi.items()},
+}
+
+cache_api = OrderedDict()  # (vue, filtres, format, signatures) -> (etag, corps)
+_verrou_api = threading.Lock()
+
+def filtrer_vue(table, filtres):
+    # filtres : (colonne, valeurs) ; valeurs converties au type de la colonne
+    for colonne, valeurs in filtres:
+        if pd.api.types.is_numeric_dtype(table[colonne]):
+            valeurs = pd.to_numeric(pd.Series(valeurs), errors='coerce').tolist()
+        table = table[table[colonne].isin(valeurs)]
+    return table
+
+def encoder_table(table, format_sortie):
+    if format_sortie == 'csv':
+        return table.to_csv(index=False).encode('utf-8')
+    if format_sortie == 'arrow':
+        puits = pyarrow.BufferOutputStream()
+        arrow = pyarrow.Table.from_pandas(table, preserve_index=False)
+        with pyarrow.ipc.new_stream(puits, arrow.schema) as flux:
+            flux.write_table(arrow)
+        return puits.getvalue().to_pybytes()
+    return table.to_json(orient='records', force_ascii=False).encode('utf-8')
+
+def erreur_api(statut, message):
+    return jsonify({'erreur': message}), statut
+
+@app.server.route('/api/v1')
+def api_vues():
+    return jsonify({
+        nom: {'colonnes': list(table().columns), 'formats': list(FORMATS_API)}
+        for nom, (_, table) in vues_api.items()
+    })
+
+@app.server.route('/api/v1/<vue>')
+def api_vue(vue):
+    if vue not in vues_api:
+        return erreur_api(404, f"vue inconnue : {vue}")
+    noms_jeux, table = vues_api[vue]
+    format_sortie = request.args.get('format') or request.accept_mimetypes.best_match(
+        list(FORMATS_API.values()), FORMATS_API['json']).split(';')[0]
+    format_sortie = {type_mime: nom for nom, type_mime in FORMATS_API.items()}.get(format_sortie, format_sortie)
+    if format_sortie not in FORMATS_API:
+        return erreur_api(400, f"format inconnu : {format_sortie} (json, csv ou arrow)")
+    if format_sortie == 'arrow' and pyarrow is None:
+        return erreur_api(406, "pyarrow n'est pas installé sur le serveur")
+    filtres = tuple(sorted((colonne, tuple(request.args.getlist(colonne))) for colonne in request.args if colonne != 'format'))
+
+    # Version des fichiers lus (identique d'un processus à l'autre) : clé du cache et de l'ETag
+    cle = (vue, filtres, format_sortie, tuple(etat_jeu(nom).signature for nom in noms_jeux))
+    with _verrou_api:
+        trouve = cle in cache_api
+        if trouve:
+            cache_api.move_to_end(cle)
+            etag, corps = cache_api[cle]
+    if not trouve:
+        etag = hashlib.sha1(repr(cle).encode()).hexdigest()[:20]
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        complete = table()
+        inconnues = [colonne for colonne, _ in filtres if colonne not in complete.columns]
+        if inconnues:
+            return erreur_api(400, f"colonnes inconnues : {', '.join(inconnues)}")
+        corps = encoder_table(filtrer_vue(complete, filtres), format_sortie)
+        with _verrou_api:
+            cache_api[cle] = (etag, corps)
+            if len(cache_api) > TAILLE_CACHE_API:
+                cache_api.popitem(last=False)
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    reponse = Response(corps, mimetype=FORMATS_API[format_sortie])
+    reponse.set_etag(etag)
+    reponse.cache_control.no_cache = True  # réutilisable après revalidation (304 si les données n'ont pas changé)
+    reponse.vary.add('Accept')
+    return reponse
+
+
+# Filtrage côté navigateur : données en colonnes et figures gabarits pour assets/clientside.js
+
+@mesures.phase('serialisation')
+def colonnes_compactes(df, colonnes):
+    # Format colonnes ; les colonnes texte sont encodées en dictionnaire (modalités + codes)
+    table = {}
+    for colonne in colonnes:
+        serie = df[colonne]
+        if pd.api.types.is_numeric_dtype(serie):
+            table[colonne] = serie.tolist()
+        else:
+            codes, modalites = pd.factorize(serie)
+            table[colonne] = {'modalites': modalites.tolist(), 'codes': codes.tolist()}
+    return table
+
+# onglet -> (nom côté navigateur, jeu de données, colonnes envoyées, construction des figures, colonne filtrée)
+onglets_client = {
+    'tab-1': ('effectifs', "salaire_effectifs", ["Année", "Collège", "Genre", "Salaire mensuel moyen (€, brut)", "Nombre de salariés"],
+              figures_effectifs, "Collège"),
+    'tab-2': ('evolutions', "formation_evo", ["Année", "Collège", "Genre", "Evolution", "Proportion d'évolutions (%)", "Proportion d'employés formés (%)"],
+              figures_evolutions, "Evolution"),
+    # Onglet 5 : pas de table, les images de chaque année sont envoyées toutes calculées (voir images_temps_partiel)
+    'tab-5': ('temps_partiel', "temps_partiel_final", [], figures_temps_partiel, "Collège"),
+}
+
+cache_donnees_client = {}  # onglet -> (version du jeu, données envoyées au navigateur)
+
+def donnees_client(onglet):
+    # Aussi utilisé en filtrage serveur : les gabarits sont les figures montées que les Patch modifient
+    _, nom_jeu, colonnes, figures, colonne_filtre = onglets_client[onglet]
+    version = version_jeux(nom_jeu)
+    if onglet in cache_donnees_client and cache_donnees_client[onglet][0] == version:
+        return cache_donnees_client[onglet][1]
+    donnees = {
+        'table': colonnes_compactes(jeu(nom_jeu), colonnes),
+        # Figures rendues une fois sur le serveur, dont le navigateur ne remplace que les données et le titre
+        'gabarits': [serialiser(fig) for fig in figures(modalites(nom_jeu, colonne_filtre)[0])],
+    }
+    if onglet == 'tab-5':
+        donnees['images'] = images_temps_partiel()
+    cache_donnees_client[onglet] = (version, donnees)
+    return donnees
+
+@app.callback(
+    Output('donnees-client', 'data'),
+    Input('tabs-with-classes', 'value'),
+    State('donnees-client', 'data')
+)
+def charger_donnees_client(tab, donnees):
+    # Envoie les données d'un onglet filtré côté navigateur à sa première ouverture dans la session
+    if not FILTRAGE_CLIENT or tab not in onglets_client or onglets_client[tab][0] in (donnees or {}):
+        raise PreventUpdate
+    patch = Patch()
+    patch[onglets_client[tab][0]] = donnees_client(tab)
+    return patch
+
+app.clientside_callback(
+    ClientsideFunction(namespace='bilan_social', function_name='effectifs'),
+    Output('graph-client_1_0', 'figure'),
+    Output('graph-client_1_1', 'figure'),
+    Input('effectifs-dropdown', 'value'),
+    Input('donnees-client', 'data')
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='bilan_social', function_name='evolutions'),
+    Output('graph-client_2_0', 'figure'),
+    Output('graph-client_2_1', 'figure'),
+    Input('evolution-dropdown', 'value'),
+    Input('donnees-client', 'data')
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='bilan_social', function_name='temps_partiel'),
+    Output('graph-client_5_0', 'figure'),
+    Output('graph-client_5_1', 'figure'),
+    Input('temps_partiel-dropdown', 'value'),
+    Input('donnees-client', 'data')
+)
+
+# Pré-calcul : rend chaque état du tableau de bord à l'avance dans un dossier d'artefacts
+DOSSIER_ARTEFACTS = os.environ.get("DOSSIER_ARTEFACTS", "artefacts")
+
+def empreinte_fichier(chemin):
+    with open(chemin, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+# Fichiers de code dont dépendent les rendus : un déploiement invalide les artefacts
+FICHIERS_CODE = ["app.py", "topologie.py", "egapro.py", "ressources.py"]
+
+def configuration_rendu():
+    # Réglages qui changent les rendus ; les artefacts produits avec d'autres réglages sont ignorés
+    import plotly, dash
+    return {
+        'code': hashlib.sha1(''.join(empreinte_fichier(chemin) for chemin in FICHIERS_CODE).encode()).hexdigest(),
+        'dash': dash.__version__,
+        'plotly': plotly.__version__,
+        'FILTRAGE_CLIENT': FILTRAGE_CLIENT,
+        'ALLEGER_FIGURES': ALLEGER_FIGURES,
+        'MOTEUR_CARTE': MOTEUR_CARTE,
+        'ENCODAGE_GEOMETRIE': ENCODAGE_GEOMETRIE,
+        'TOLERANCE_SIMPLIFICATION': TOLERANCE_SIMPLIFICATION,
+        'PRECISION_COORDONNEES': PRECISION_COORDONNEES,
+        'QUANTIFICATION_TOPOJSON': QUANTIFICATION_TOPOJSON,
+        'FICHIER_ENTREPRISES': FICHIER_ENTREPRISES if "entreprises" in jeux_donnees else None,
+    }
+
+def nom_artefact(nom, valeur):
+    return f"{nom}-{hashlib.sha1(json.dumps(valeur).encode()).hexdigest()[:16]}.json"
+
+def rendre_artefact(nom, valeur):
+    # Exécuté dans un processus du pool : rend un état (sans passer par le cache) et renvoie sa sortie en JSON
+    return json.dumps(serialiser(cache_rendu.fonctions[nom].__wrapped__(valeur)))
+
+def precalculer(dossier=DOSSIER_ARTEFACTS, processus=None):
+    os.makedirs(dossier, exist_ok=True)
+    taches = [
+        (nom, valeur.item() if hasattr(valeur, 'item') else valeur)
+        for nom, domaine in cache_rendu.domaines.items() if domaine is not None
+        for valeur in domaine()
+    ]
+    entrees = []
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        resultats = pool.map(rendre_artefact, *zip(*taches))
+        for (nom, valeur), sortie in zip(taches, resultats):
+            fichier = nom_artefact(nom, valeur)
+            with open(os.path.join(dossier, fichier), 'w', encoding='utf-8') as f:
+                f.write(sortie)
+            entrees.append({'callback': nom, 'valeur': valeur, 'fichier': fichier})
+    sources = sorted(set().union(*cache_rendu.sources.values()))
+    manifeste = {
+        'configuration': configuration_rendu(),
+        'sources': {chemin: empreinte_fichier(chemin) for chemin in sources},
+        'entrees': entrees,
+    }
+    with open(os.path.join(dossier, 'manifeste.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=2)
+    print(f"{len(entrees)} états pré-calculés dans {dossier}/")
+
+def charger_artefacts(dossier=DOSSIER_ARTEFACTS):
+    # Charge les artefacts encore à jour dans le cache de rendu (ignorés si les sources, le code ou les réglages ont changé)
+    chemin_manifeste = os.path.join(dossier, 'manifeste.json')
+    if not os.path.exists(chemin_manifeste):
+        return 0
+    with open(chemin_manifeste, encoding='utf-8') as f:
+        manifeste = json.load(f)
+    if manifeste.get('configuration') != configuration_rendu():
+        print(f"Artefacts de {dossier}/ ignorés : produits avec un autre code ou d'autres réglages")
+        return 0
+    a_jour = {
+        chemin for chemin, empreinte in manifeste['sources'].items()
+        if os.path.exists(chemin) and empreinte_fichier(chemin) == empreinte
+    }
+    charges = 0
+    for entree in manifeste['entrees']:
+        nom = entree['callback']
+        if nom not in cache_rendu.sources or not cache_rendu.sources[nom] <= a_jour:
+            continue
+        with open(os.path.join(dossier, entree['fichier']), encoding='utf-8') as f:
+            cache_rendu.ecrire((nom, entree['valeur']), json.load(f))
+        charges += 1
+    return charges
+
+charger_artefacts()
+
+# Export statique (python app.py --exporter DOSSIER) : une page HTML par onglet, dont les listes déroulantes
+# basculent entre des états pré-rendus en parallèle ; plotly.js, styles, modèle de mise en page et
+# géométrie des régions sont écrits une seule fois et partagés par les pages
+DOSSIER_EXPORT = os.environ.get("DOSSIER_EXPORT", "export")
+
+# liste déroulante -> (onglet, valeurs, rendu d'un état, cibles (identifiant, 'figure' | 'html'))
+# cibles None : les graphiques de l'onglet, dans l'ordre d'affichage
+listes_export = {
+    'effectifs-dropdown': ('tab-1', lambda: modalites("salaire_effectifs", "Collège"), figures_effectifs, None),
+    'evolution-dropdown': ('tab-2', lambda: modalites("formation_evo", "Evolution"), figures_evolutions, None),
+    'temps_partiel-dropdown': ('tab-5', lambda: modalites("temps_partiel_final", "Collège"), figures_temps_partiel, None),
+    'indicateur-dropdown': ('tab-6', lambda: indicateur_df6, lambda valeur: (figure_carte(valeur), titre_carte(valeur)),
+                            [('carte-export', 'figure'), ('titre-carte', 'html')]),
+    'select-indicateur': ('tab-6', lambda: list(indicateur_links), lambda valeur: (update_link(valeur),),
+                          [('definition-link', 'html')]),
+}
+
+def contenu_onglet_export(onglet):
+    contenu = render_content.__wrapped__(onglet)
+    if onglet == 'tab-6':
+        # Carte plotly (quel que soit MOTEUR_CARTE) à la suite du titre, du texte et de la liste déroulante
+        contenu.children = contenu.children[:3] + [html.Div(
+            mise_en_page_carte(indicateur_df6[0], dcc.Graph(id='carte-export', style={'height': '700px'})),
+            style={'margin-top': '20px'})]
+    return contenu
+
+def rendre_export(liste, valeur):
+    # Exécuté dans un processus du pool : contenu d'un onglet (liste None) ou état d'une liste déroulante
+    if liste is None:
+        return json.dumps(serialiser(contenu_onglet_export(valeur)))
+    return json.dumps([serialiser(sortie) for sortie in listes_export[liste][2](valeur)])
+
+def exporter(dossier=DOSSIER_EXPORT, processus=None):
+    etats = [
+        (liste, valeur.item() if hasattr(valeur, 'item') else valeur)
+        for liste, (_, valeurs, _, _) in listes_export.items() for valeur in valeurs()
+    ]
+    taches = [(None, onglet) for onglet in onglets] + etats
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        rendus = dict(zip(taches, (json.loads(sortie) for sortie in pool.map(rendre_export, *zip(*taches)))))
+
+    for sous_dossier in ('ressources', 'donnees'):
+        os.makedirs(os.path.join(dossier, sous_dossier), exist_ok=True)
+    from plotly.offline import get_plotlyjs
+    with open(os.path.join(dossier, 'ressources', 'plotly.min.js'), 'w', encoding='utf-8') as f:
+        f.write(get_plotlyjs())
+    with open(os.path.join(dossier, 'ressources', 'export.js'), 'w', encoding='utf-8') as f:
+        f.write(statique.SCRIPT_PAGES)
+    shutil.copy(os.path.join('assets', 'style.css'), os.path.join(dossier, 'ressources', 'style.css'))
+
+    # Contenus communs : modèle de mise en page des figures, géométrie de la carte
+    modele = serialiser(go.Figure())['layout']['template']
+    geometrie = serialiser(figure_carte(indicateur_df6[0]))['data'][0]['geojson']
+    with open(os.path.join(dossier, 'donnees', 'modele.js'), 'w', encoding='utf-8') as f:
+        f.write(statique.script_donnees('EXPORT_MODELE', modele))
+    with open(os.path.join(dossier, 'donnees', 'geometrie.js'), 'w', encoding='utf-8') as f:
+        f.write(statique.script_donnees('EXPORT_GEOMETRIE', geometrie))
+
+    fichiers_onglets = {onglet: 'index.html' if onglet == onglets[0] else f"{onglet}.html" for onglet in onglets}
+    for onglet in onglets:
+        contenu = rendus[(None, onglet)]
+        arbre = serialiser(app.layout)
+        statique.remplacer_enfants(arbre, 'tabs-content-classes', contenu)
+        page = statique.Page(onglet, fichiers_onglets)
+        corps = page.vers_html(arbre)
+        liaisons = []
+        for liste, (onglet_liste, _, _, cibles) in listes_export.items():
+            if onglet_liste != onglet:
+                continue
+            cibles = cibles or [(identifiant, 'figure') for identifiant in statique.graphiques(contenu)]
+            liaisons.append({
+                'source': liste,
+                'cibles': cibles,
+                'etats': {
+                    str(valeur): [statique.mettre_en_commun(sortie, modele, geometrie) if type_cible == 'figure'
+                                  else page.vers_html(sortie)
+                                  for sortie, (_, type_cible) in zip(rendus[(liste, valeur)], cibles)]
+                    for liste_etat, valeur in etats if liste_etat == liste
+                },
+            })
+        figures = {identifiant: statique.mettre_en_commun(figure, modele, geometrie) for identifiant, figure in page.figures.items()}
+        nom_page = fichiers_onglets[onglet][:-len('.html')]
+        donnees_page = statique.script_donnees('EXPORT', {'figures': figures, 'liaisons': liaisons})
+        with open(os.path.join(dossier, 'donnees', f"{nom_page}.js"), 'w', encoding='utf-8') as f:
+            f.write(donnees_page)
+        # Ressources copiées localement (logo) : recopiées dans l'export
+        for chemin in set(re.findall(r'="/ressources/([^"]+)"', corps)):
+            os.makedirs(os.path.join(dossier, 'ressources', 'vendor', os.path.dirname(chemin)), exist_ok=True)
+            shutil.copy(os.path.join(ressources.DOSSIER_VENDOR, chemin), os.path.join(dossier, 'ressources', 'vendor', chemin))
+        corps = corps.replace('="/ressources/', '="ressources/vendor/')
+        # Géométrie chargée par les seules pages qui l'utilisent
+        scripts = '<script src="donnees/geometrie.js"></script>\n' if f'"{statique.GEOMETRIE}"' in donnees_page else ''
+        with open(os.path.join(dossier, fichiers_onglets[onglet]), 'w', encoding='utf-8') as f:
+            f.write(statique.GABARIT_PAGE.format(titre="Bilan social EDF SA", scripts=scripts, page=nom_page, corps=corps))
+    print(f"{len(onglets)} pages et {len(etats)} états exportés dans {dossier}/")
+
+# Rechargement à chaud : un fichier modifié dans data/ est relu seul, puis tout ce qui en dérive
+# (index, caches, figures en cache de rendu) est reconstruit sans redémarrer le serveur
+INTERVALLE_SURVEILLANCE = float(os.environ.get("INTERVALLE_SURVEILLANCE", "2"))  # en secondes, 0 = désactivé
+
+# Les caches dérivés des jeux (géométrie, KPI, données des onglets filtrés côté navigateur...) sont
+# par version des jeux (voir par_version) : ils changent avec le jeu, sans invalidation séparée
+def recharger_fichiers(fichiers, rechauffer=True):
+    recharges = set()
+    for nom, (source, _) in jeux_donnees.items():
+        if source not in fichiers:
+            continue
+        try:
+            recharger_jeu(nom)
+        except Exception as erreur:
+            print(f"Rechargement de {source} impossible, version précédente conservée : {erreur}")
+            continue
+        recharges.add(source)
+    if recharges:
+        print(f"Données rechargées : {', '.join(sorted(recharges))}")
+        try:
+            cles = cache_rendu.invalider(recharges)
+            if rechauffer:
+                cache_rendu.rechauffer(cles)
+        except Exception as erreur:
+            # Les rendus manquants seront refaits (et l'erreur renvoyée) à la prochaine requête
+            print(f"Rendu des nouvelles données impossible : {erreur!r}")
+    return recharges
+
+# Sans surveillance : fichiers vérifiés par les requêtes (voir CacheRendu.verifier_sources), rendus refaits à la demande
+cache_rendu.rechargement = functools.partial(recharger_fichiers, rechauffer=False)
+
+def surveiller_donnees(intervalle=INTERVALLE_SURVEILLANCE):
+    cache_rendu.rechargement = None  # la surveillance relit les fichiers une fois leur écriture terminée
+    signatures = {source: signature_fichier(source) for source, _ in jeux_donnees.values()}
+    en_cours = {}  # fichier modifié -> signature vue au tour précédent
+
+    def boucle():
+        while True:
+            time.sleep(intervalle)
+            stables = set()
+            for source, ancienne in signatures.items():
+                signature = signature_fichier(source)
+                if signature == ancienne:
+                    en_cours.pop(source, None)
+                # Fichier en cours d'écriture : pris en compte quand il n'a pas bougé pendant un tour
+                elif en_cours.get(source) == signature:
+                    signatures[source] = signature
+                    del en_cours[source]
+                    stables.add(source)
+                else:
+                    en_cours[source] = signature
+            if stables:
+                try:
+                    recharger_fichiers(stables)
+                except Exception as erreur:
+                    # La surveillance continue : un fichier corrigé sera relu au tour suivant
+                    print(f"Rechargement interrompu : {erreur!r}")
+
+    threading.Thread(target=boucle, name="surveillance-donnees", daemon=True).start()
+
+# Mode production : serveur gunicorn pré-forké (dépendance optionnelle). Les données et les rendus
+# sont chargés une fois dans le processus maître ; les travailleurs les partagent par copie à l'écriture
+TRAVAILLEURS = int(os.environ.get("TRAVAILLEURS", str(os.cpu_count() or 1)))
+FILS_PAR_TRAVAILLEUR = int(os.environ.get("FILS_PAR_TRAVAILLEUR", "4"))
+ADRESSE_PRODUCTION = os.environ.get("ADRESSE_PRODUCTION", "0.0.0.0:8050")
+
+server = app.server
+
+def prechauffer():
+    for nom in jeux_donnees:
+        jeu(nom)
+    geometrie_regions()
+    if ENCODAGE_GEOMETRIE == "topojson":
+        topologie_regions()
+    for onglet in onglets_client:
+        donnees_client(onglet)
+    kpi_tableau_de_bord()
+    rendus = 0
+    for nom, domaine in cache_rendu.domaines.items():
+        if domaine is None:
+            continue
+        for valeur in domaine():
+            cache_rendu.fonctions[nom](valeur)
+            rendus += 1
+    if gestionnaire_arriere_plan is not None:
+        cache_disque.close()  # connexion SQLite rouverte par chaque processus après le fork
+    # Objets chargés exclus du ramasse-miettes : ses parcours ne recopient plus les pages partagées
+    gc.collect()
+    gc.freeze()
+    return rendus
+
+def servir_production(travailleurs=TRAVAILLEURS, fils=FILS_PAR_TRAVAILLEUR, adresse=ADRESSE_PRODUCTION):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("gunicorn est nécessaire pour le mode production (pip install gunicorn)")
+
+    def apres_fork(arbitre, travailleur):
+        # Les fils ne survivent pas au fork : surveillance des données relancée dans chaque travailleur
+        if INTERVALLE_SURVEILLANCE:
+            surveiller_donnees()
+
+    class ServeurProduction(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': adresse,
+                'workers': travailleurs,
+                'threads': fils,
+                'worker_class': 'gthread' if fils > 1 else 'sync',
+                'preload_app': True,
+                'post_fork': apres_fork,
+            }
+            for cle, valeur in options.items():
+                self.cfg.set(cle, valeur)
+
+        def load(self):
+            return server
+
+    rendus = prechauffer()
+    print(f"{len(jeux_donnees)} jeux de données et {rendus} rendus chargés, {travailleurs} travailleurs x {fils} fils sur {adresse}")
+    ServeurProduction().run()
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    parser = argparse.ArgumentParser(description="Tableau de bord diversité et inclusion EDF SA")
+    parser.add_argument('--precalculer', action='store_true',
+                        help="rend tous les états du tableau de bord dans le dossier d'artefacts puis quitte")
+    parser.add_argument('--artefacts', default=DOSSIER_ARTEFACTS, help="dossier des artefacts pré-calculés")
+    parser.add_argument('--processus', type=int, default=None, help="nombre de processus pour le pré-calcul et l'export")
+    parser.add_argument('--convertir', action='store_true',
+                        help="convertit les fichiers de data/ en Parquet (chargement plus rapide) puis quitte")
+    parser.add_argument('--egapro', metavar='EXPORT',
+                        help="recalcule data/maps.csv à partir de l'export Index Egapro (CSV) puis quitte")
+    parser.add_argument('--tranche', action='append', default=None,
+                        help="tranche d'effectifs retenue (répétable, défaut : \"1000 et plus\")")
+    parser.add_argument('--annee', action='append', type=int, default=None,
+                        help="année de déclaration retenue (répétable : moyenne sur les années, défaut : la plus récente)")
+    parser.add_argument('--naf', action='append', default=None, help="préfixe de code NAF retenu (répétable)")
+    parser.add_argument('--separateur', default=';', help="séparateur de l'export Egapro")
+    parser.add_argument('--exporter', metavar='DOSSIER', nargs='?', const=DOSSIER_EXPORT,
+                        help="exporte le tableau de bord en pages HTML statiques (états pré-rendus) puis quitte")
+    parser.add_argument('--vendoriser', action='store_true',
+                        help="copie les ressources front de la carte et le logo dans assets/vendor puis quitte")
+    parser.add_argument('--production', action='store_true',
+                        help="sert l'application avec gunicorn (processus pré-forkés, données chargées avant le fork)")
+    parser.add_argument('--travailleurs', type=int, default=TRAVAILLEURS, help="nombre de processus du mode production")
+    parser.add_argument('--fils', type=int, default=FILS_PAR_TRAVAILLEUR, help="fils par processus du mode production")
+    parser.add_argument('--adresse', default=ADRESSE_PRODUCTION, help="adresse d'écoute du mode production (hôte:port)")
+    args = parser.parse_args()
+    if args.egapro:
+        moyennes = egapro.agreger_regions(args.egapro, indicateur_df6, args.tranche or ["1000 et plus"],
+                                          args.annee, args.naf, args.separateur)
+        egapro.ecrire_maps(moyennes, jeux_donnees["maps"][0])
+        # Un serveur en cours relit le fichier par la surveillance des données (voir surveiller_donnees)
+        relecture = f" (relu par un serveur en cours sous {INTERVALLE_SURVEILLANCE:g} s)" if INTERVALLE_SURVEILLANCE else ""
+        print(f"{len(moyennes)} régions écrites dans {jeux_donnees['maps'][0]}{relecture}")
+    elif args.convertir:
+        convertir_donnees()
+    elif args.exporter:
+        exporter(args.exporter, args.processus)
+    elif args.vendoriser:
+        vendoriser_ressources()
+    elif args.precalculer:
+        precalculer(args.artefacts, args.processus)
+    elif args.production:
+        servir_production(args.travailleurs, args.fils, args.adresse)
+    else:
+        if INTERVALLE_SURVEILLANCE:
+            surveiller_donnees()
+        app.run(debug=True)
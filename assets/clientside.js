@@ -0,0 +1,126 @@
+// Callbacks côté navigateur des onglets 1, 2 et 5 : les données d'un onglet sont chargées
+// une fois par session dans le dcc.Store 'donnees-client' (format colonnes, ou images par année
+// pour l'onglet 5), le filtrage et la mise à jour des figures se font ici sans aller-retour serveur.
+
+(function () {
+    // Décodage des colonnes (les colonnes texte sont encodées en dictionnaire)
+    var tablesDecodees = new WeakMap();
+
+    function table(donnees, nom) {
+        var brute = donnees[nom].table;
+        if (!tablesDecodees.has(brute)) {
+            var colonnes = {};
+            Object.keys(brute).forEach(function (colonne) {
+                var valeurs = brute[colonne];
+                colonnes[colonne] = valeurs.codes ?
+                    valeurs.codes.map(function (code) { return valeurs.modalites[code]; }) :
+                    valeurs;
+            });
+            tablesDecodees.set(brute, colonnes);
+        }
+        return tablesDecodees.get(brute);
+    }
+
+    function lignes(colonnes, filtres) {
+        var indices = [];
+        var n = colonnes[Object.keys(colonnes)[0]].length;
+        for (var i = 0; i < n; i++) {
+            var garder = Object.keys(filtres).every(function (colonne) {
+                return colonnes[colonne][i] === filtres[colonne];
+            });
+            if (garder) {
+                indices.push(i);
+            }
+        }
+        return indices;
+    }
+
+    // Les données de l'onglet arrivent à sa première ouverture
+    function verifier(donnees, nom) {
+        if (!donnees || !donnees[nom]) {
+            throw window.dash_clientside.PreventUpdate;
+        }
+    }
+
+    function copie(objet) {
+        return JSON.parse(JSON.stringify(objet));
+    }
+
+    // Remplace la partie du titre située après le dernier " - " (la valeur sélectionnée)
+    function titre(figure, suffixe) {
+        var texte = figure.layout.title.text;
+        var position = texte.lastIndexOf(' - ');
+        figure.layout.title.text = texte.slice(0, position + 3) + suffixe;
+    }
+
+    // Une trace par genre (px.bar / px.line avec color="Genre")
+    function tracesParGenre(gabarit, colonnes, indices, x, y, suffixe) {
+        var figure = copie(gabarit);
+        figure.data.forEach(function (trace) {
+            var indicesGenre = indices.filter(function (i) { return colonnes.Genre[i] === trace.name; });
+            trace.x = indicesGenre.map(function (i) { return colonnes[x][i]; });
+            trace.y = indicesGenre.map(function (i) { return colonnes[y][i]; });
+        });
+        titre(figure, suffixe);
+        return figure;
+    }
+
+    // Figure animée par année (voir animer_par_annee) : images du filtre choisi,
+    // trace et titre de l'image sélectionnée par le curseur du gabarit
+    function animation(gabarit, images) {
+        var figure = copie(gabarit);
+        var image = images[figure.layout.sliders[0].active];
+        figure.frames = copie(images);
+        figure.data.forEach(function (trace, i) {
+            Object.keys(image.data[i]).forEach(function (cle) {
+                if (cle !== 'type') {
+                    trace[cle] = copie(image.data[i][cle]);
+                }
+            });
+        });
+        figure.layout.title.text = image.layout.title.text;
+        return figure;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        bilan_social: {
+            effectifs: function (college, donnees) {
+                verifier(donnees, 'effectifs');
+                var colonnes = table(donnees, 'effectifs');
+                var indices = lignes(colonnes, {'Collège': college});
+                var gabarits = donnees.effectifs.gabarits;
+                return [
+                    tracesParGenre(gabarits[0], colonnes, indices, 'Année', 'Nombre de salariés', college),
+                    tracesParGenre(gabarits[1], colonnes, indices, 'Année', 'Salaire mensuel moyen (€, brut)', college)
+                ];
+            },
+            evolutions: function (evolution, donnees) {
+                verifier(donnees, 'evolutions');
+                var colonnes = table(donnees, 'evolutions');
+                var indices = lignes(colonnes, {'Evolution': evolution});
+                var colleges = [];
+                indices.forEach(function (i) {
+                    if (colleges.indexOf(colonnes['Collège'][i]) < 0) {
+                        colleges.push(colonnes['Collège'][i]);
+                    }
+                });
+                var gabarits = donnees.evolutions.gabarits;
+                return [
+                    tracesParGenre(gabarits[0], colonnes, indices, 'Année', "Proportion d'employés formés (%)", colleges.join(', ')),
+                    tracesParGenre(gabarits[1], colonnes, indices, 'Année', "Proportion d'évolutions (%)", evolution)
+                ];
+            },
+            temps_partiel: function (college, donnees) {
+                verifier(donnees, 'temps_partiel');
+                var images = donnees.temps_partiel.images[college];
+                return donnees.temps_partiel.gabarits.map(function (gabarit) {
+                    return animation(gabarit, images);
+                });
+            },
+            // Moteur de carte "plotly" : graphique monté hors des onglets, visible sous l'onglet 6
+            afficher_carte: function (onglet) {
+                return {'display': onglet === 'tab-6' ? 'block' : 'none', 'padding': '0 20px'};
+            }
+        }
+    });
+})();
@@ -0,0 +1,181 @@
+# Banc d'essai des callbacks : appelle chaque callback directement (sans navigateur) pour
+# chaque valeur de liste déroulante, et mesure latence (p50/p95), taille de la réponse
+# sérialisée et pic mémoire. Les résultats sont écrits en JSON pour comparer deux exécutions.
+#
+#   python benchmark.py                              # rendu sans cache, résultats dans benchmark.json
+#   python benchmark.py --avec-cache                 # latence servie par le cache de rendu
+#   python benchmark.py --reference ancien.json      # compare et signale les régressions
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+
+import numpy as np
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import app as tableau  # noqa: E402
+from dash.exceptions import PreventUpdate  # noqa: E402
+from plotly.io.json import to_json_plotly  # noqa: E402
+
+
+def callbacks_a_mesurer(avec_cache):
+    # nom -> (fonction, liste des arguments à essayer)
+    def rendu(nom):
+        fonction = tableau.cache_rendu.fonctions[nom]
+        return fonction if avec_cache else fonction.__wrapped__
+
+    def valeurs(nom):
+        return [(valeur,) for valeur in tableau.cache_rendu.domaines[nom]()]
+
+    return {
+        'render_content': (rendu('onglets'), valeurs('onglets')),
+        'update_graphs (tab-1)': (rendu('effectifs'), valeurs('effectifs')),
+        'update_graphs (tab-2)': (rendu('evolutions'), valeurs('evolutions')),
+        'display_alternance_graphs': (rendu('alternance'), valeurs('alternance')),
+        'update_temps_partiel_graphs': (rendu('temps_partiel'), valeurs('temps_partiel')),
+        'update_map': (rendu('carte'), valeurs('carte')),
+        'changer_indicateur_carte': (rendu('carte_plotly'), valeurs('carte_plotly')),
+        'update_link': (tableau.update_link, [(None,)] + [(cle,) for cle in tableau.indicateur_links]),
+        'tableau_de_bord': (rendu('tableau_de_bord'), valeurs('tableau_de_bord')),
+        'charger_donnees_client': (tableau.charger_donnees_client, [(onglet, {}) for onglet in tableau.onglets_client]),
+    }
+
+
+def vider_caches():
+    # Sans --avec-cache, chaque appel rend vraiment : sorties des callbacks appelés à l'intérieur
+    # d'un autre (onglets 0 et 3) et données des onglets filtrés dans le navigateur
+    tableau.cache_rendu.invalider()
+    tableau.cache_donnees_client.clear()
+
+
+def appeler(fonction, args, avec_cache=True):
+    if not avec_cache:
+        vider_caches()
+    try:
+        return fonction(*args)
+    except PreventUpdate:
+        return None
+
+
+def mesurer(fonction, args, repetitions, echauffement, avec_cache):
+    for _ in range(echauffement):
+        appeler(fonction, args, avec_cache)
+    durees = []
+    for _ in range(repetitions):
+        if not avec_cache:
+            vider_caches()  # hors de la durée mesurée
+        debut = time.perf_counter()
+        sortie = appeler(fonction, args)
+        durees.append(time.perf_counter() - debut)
+    taille = len(to_json_plotly(sortie).encode()) if sortie is not None else 0
+    # Pic mémoire mesuré sur un appel à part : tracemalloc fausserait les durées
+    if not avec_cache:
+        vider_caches()
+    tracemalloc.start()
+    appeler(fonction, args)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return durees, taille, pic
+
+
+def statistiques(durees):
+    durees_ms = np.array(durees) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(durees_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(durees_ms, 95)), 3),
+        'moyenne_ms': round(float(durees_ms.mean()), 3),
+    }
+
+
+def executer(repetitions, echauffement, avec_cache):
+    resultats = {}
+    for nom, (fonction, liste_args) in callbacks_a_mesurer(avec_cache).items():
+        if not liste_args:
+            continue  # callback inactif avec la configuration courante (MOTEUR_CARTE)
+        toutes_durees, par_valeur = [], {}
+        for args in liste_args:
+            durees, taille, pic = mesurer(fonction, args, repetitions, echauffement, avec_cache)
+            toutes_durees += durees
+            par_valeur[str(args[0])] = {**statistiques(durees), 'taille_octets': taille, 'memoire_pic_octets': pic}
+        resultats[nom] = {
+            **statistiques(toutes_durees),
+            'taille_octets': max(valeur['taille_octets'] for valeur in par_valeur.values()),
+            'memoire_pic_octets': max(valeur['memoire_pic_octets'] for valeur in par_valeur.values()),
+            'valeurs': par_valeur,
+        }
+        print(f"{nom:32} p50 {resultats[nom]['p50_ms']:9.2f} ms   p95 {resultats[nom]['p95_ms']:9.2f} ms   "
+              f"{resultats[nom]['taille_octets'] / 1024:9.1f} Ko   pic {resultats[nom]['memoire_pic_octets'] / 1024 / 1024:7.2f} Mo")
+    return resultats
+
+
+def versions():
+    import dash, plotly, pandas, folium
+    return {
+        'python': platform.python_version(),
+        'dash': dash.__version__,
+        'plotly': plotly.__version__,
+        'pandas': pandas.__version__,
+        'folium': folium.__version__,
+    }
+
+
+# Écart absolu minimal pour signaler une régression : en dessous, le rapport ne mesure que du bruit
+PLANCHERS = {'p50_ms': 1.0, 'p95_ms': 1.0, 'taille_octets': 1024, 'memoire_pic_octets': 64 * 1024}
+
+
+def comparer(resultats, reference, seuil, planchers=PLANCHERS):
+    # Renvoie la liste des régressions (rapport nouveau / référence au-delà du seuil
+    # et écart au-delà du plancher de la mesure)
+    regressions = []
+    print(f"\nComparaison avec la référence (seuil x{seuil}) :")
+    for nom, mesures in resultats.items():
+        if nom not in reference:
+            continue
+        for cle, plancher in planchers.items():
+            ancien, nouveau = reference[nom][cle], mesures[cle]
+            if not ancien:
+                continue
+            rapport = nouveau / ancien
+            marque = ''
+            if rapport > seuil and nouveau - ancien > plancher:
+                marque = '  <-- régression'
+                regressions.append((nom, cle, rapport))
+            print(f"  {nom:32} {cle:20} {ancien:12.2f} -> {nouveau:12.2f}  x{rapport:.2f}{marque}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Banc d'essai des callbacks du tableau de bord")
+    parser.add_argument('--repetitions', type=int, default=20, help="appels mesurés par valeur")
+    parser.add_argument('--echauffement', type=int, default=1, help="appels non mesurés avant la mesure")
+    parser.add_argument('--avec-cache', action='store_true', help="passe par le cache de rendu au lieu de rendre à chaque appel")
+    parser.add_argument('--sortie', default='benchmark.json', help="fichier JSON des résultats")
+    parser.add_argument('--reference', help="résultats d'une exécution précédente à comparer")
+    parser.add_argument('--seuil', type=float, default=1.2, help="rapport au-delà duquel une mesure est une régression")
+    parser.add_argument('--plancher-ms', type=float, default=PLANCHERS['p50_ms'],
+                        help="écart de latence (ms) en dessous duquel une hausse n'est pas une régression")
+    parser.add_argument('--plancher-octets', type=int, default=PLANCHERS['taille_octets'],
+                        help="écart de taille (octets) en dessous duquel une hausse n'est pas une régression")
+    args = parser.parse_args()
+
+    resultats = executer(args.repetitions, args.echauffement, args.avec_cache)
+    rapport = {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'versions': versions(),
+        'parametres': {'repetitions': args.repetitions, 'echauffement': args.echauffement, 'avec_cache': args.avec_cache},
+        'resultats': resultats,
+    }
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {args.sortie}")
+
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            reference = json.load(f)['resultats']
+        planchers = {**PLANCHERS, 'p50_ms': args.plancher_ms, 'p95_ms': args.plancher_ms, 'taille_octets': args.plancher_octets}
+        if comparer(resultats, reference, args.seuil, planchers):
+            sys.exit(1)
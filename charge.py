@@ -0,0 +1,480 @@
+# Test de charge : démarre app.server en mode production (gunicorn) sur un port local, puis
+# rejoue des sessions réalistes de N utilisateurs simultanés sur /_dash-update-component
+# (ouverture sur l'onglet 0, changements d'onglet, parcours des listes déroulantes).
+# Les callbacks déclenchés sont déduits de /_dash-dependencies comme le ferait le navigateur.
+# Mesures : débit, latence par callback (p50/p95/p99), taux d'erreur, CPU et mémoire du serveur.
+#
+#   python charge.py --utilisateurs 50 --duree 120               # résultats dans charge.json
+#   FILTRAGE_CLIENT=0 python charge.py --travailleurs 8          # l'environnement est transmis au serveur
+#   python charge.py --url http://serveur:8050 --pid 1234        # serveur déjà démarré
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+import urllib.parse
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+
+# Listes déroulantes parcourues dans chaque onglet
+LISTES_DEROULANTES = ['effectifs-dropdown', 'evolution-dropdown', 'temps_partiel-dropdown', 'indicateur-dropdown']
+
+
+# 📌 Processus du serveur : CPU et mémoire (psutil si installé, /proc sinon)
+def processus(pid):
+    # Le processus et tous ses descendants (travailleurs gunicorn, processus des callbacks en arrière-plan)
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            return [pid] + [enfant.pid for enfant in parent.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            return []
+    parents = {}
+    for nom in os.listdir('/proc'):
+        if nom.isdigit():
+            try:
+                with open(f'/proc/{nom}/stat') as f:
+                    parents.setdefault(int(f.read().rsplit(')', 1)[1].split()[1]), []).append(int(nom))
+            except OSError:
+                continue
+    pids, a_voir = [], [pid]
+    while a_voir:
+        courant = a_voir.pop()
+        pids.append(courant)
+        a_voir += parents.get(courant, [])
+    return pids
+
+
+def ressources_processus(pid):
+    # (temps CPU cumulé en secondes, mémoire résidente en octets) d'un processus
+    if psutil is not None:
+        try:
+            p = psutil.Process(pid)
+            temps = p.cpu_times()
+            return temps.user + temps.system, p.memory_info().rss
+        except psutil.NoSuchProcess:
+            return 0.0, 0
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            champs = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return 0.0, 0
+    return (int(champs[11]) + int(champs[12])) / os.sysconf('SC_CLK_TCK'), pages * os.sysconf('SC_PAGE_SIZE')
+
+
+class Echantillonneur(threading.Thread):
+    # Relève à intervalle régulier le CPU (en % d'un cœur), la mémoire et le nombre de requêtes terminées
+
+    def __init__(self, pid, intervalle, statistiques):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.intervalle = intervalle
+        self.statistiques = statistiques
+        self.releves = []
+        self.arret = threading.Event()
+
+    def releve(self):
+        cpu, memoire, pids = 0.0, 0, processus(self.pid) if self.pid else []
+        for pid in pids:
+            temps, rss = ressources_processus(pid)
+            cpu += temps
+            memoire += rss
+        return time.perf_counter(), cpu, memoire, len(pids), self.statistiques.total()
+
+    def run(self):
+        precedent = self.releve()
+        debut = precedent[0]
+        while not self.arret.wait(self.intervalle):
+            courant = self.releve()
+            duree = courant[0] - precedent[0]
+            # Le temps CPU des processus terminés pendant l'intervalle est perdu : borné à 0
+            self.releves.append({
+                'instant_s': round(courant[0] - debut, 2),
+                'cpu_pourcent': round(max(courant[1] - precedent[1], 0.0) / duree * 100, 1),
+                'memoire_octets': courant[2],
+                'processus': courant[3],
+                'requetes_par_s': round((courant[4] - precedent[4]) / duree, 2),
+            })
+            precedent = courant
+
+
+# 📌 Résultats par callback
+class Statistiques:
+
+    def __init__(self):
+        self.durees = {}  # callback -> durées des appels réussis (s)
+        self.erreurs = {}  # callback -> nombre d'erreurs
+        self.octets = {}  # callback -> taille cumulée des réponses
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, nom, duree, taille, erreur):
+        with self._verrou:
+            self.durees.setdefault(nom, [])
+            self.erreurs.setdefault(nom, 0)
+            self.octets[nom] = self.octets.get(nom, 0) + taille
+            if erreur:
+                self.erreurs[nom] += 1
+            else:
+                self.durees[nom].append(duree)
+
+    def total(self):
+        with self._verrou:
+            return sum(len(durees) for durees in self.durees.values()) + sum(self.erreurs.values())
+
+    def resume(self, duree_totale):
+        resultats = {}
+        for nom in sorted(self.durees):
+            durees_ms = np.array(self.durees[nom]) * 1000
+            appels = len(durees_ms) + self.erreurs[nom]
+            resultats[nom] = {
+                'appels': appels,
+                'erreurs': self.erreurs[nom],
+                'taux_erreur': round(self.erreurs[nom] / appels, 4),
+                'par_seconde': round(appels / duree_totale, 2),
+                'taille_moyenne_octets': round(self.octets[nom] / appels),
+                **({cle: round(float(np.percentile(durees_ms, centile)), 2)
+                    for cle, centile in (('p50_ms', 50), ('p95_ms', 95), ('p99_ms', 99), ('max_ms', 100))}
+                   if len(durees_ms) else {}),
+            }
+        return resultats
+
+
+# 📌 Session d'un utilisateur simulé : état des composants et déclenchement des callbacks serveur
+def composants(valeur):
+    # Composants (type, propriétés) contenus dans une valeur de propriété children
+    if isinstance(valeur, list):
+        for enfant in valeur:
+            yield from composants(enfant)
+    elif isinstance(valeur, dict) and 'props' in valeur and 'type' in valeur:
+        yield valeur
+        for propriete in valeur['props'].values():
+            yield from composants(propriete)
+
+
+def appliquer_patch(valeur, patch):
+    # Opérations Assign/Delete d'un Patch Dash (les seules envoyées par ce tableau de bord)
+    valeur = json.loads(json.dumps(valeur if valeur is not None else {}))
+    for operation in patch['operations']:
+        cible, emplacement = valeur, operation['location']
+        for cle in emplacement[:-1]:
+            if isinstance(cible, dict):
+                cible = cible.setdefault(cle, {})
+            else:
+                cible = cible[cle]
+        if operation['operation'] == 'Assign':
+            cible[emplacement[-1]] = operation['params']['value']
+        elif operation['operation'] == 'Delete':
+            del cible[emplacement[-1]]
+    return valeur
+
+
+def sorties(callback):
+    if callback['output'].startswith('..'):
+        return callback['output'].strip('.').split('...')
+    return [callback['output']]
+
+
+class Session:
+
+    def __init__(self, url, dependances, statistiques, pause, delai):
+        adresse = urllib.parse.urlsplit(url)
+        self.hote, self.port = adresse.hostname, adresse.port or 80
+        self.prefixe = adresse.path.rstrip('/')
+        self.delai = delai
+        self.connexion = None
+        self.dependances = [callback for callback in dependances if not callback.get('clientside_function')]
+        self.statistiques = statistiques
+        self.pause = pause
+        self.valeurs = {}  # "id.propriété" -> valeur côté navigateur
+        self.montes = set()  # identifiants des composants affichés
+        self.options = {}  # identifiant de liste déroulante -> valeurs possibles
+
+    def requete(self, methode, chemin, corps=None):
+        # Connexion gardée ouverte entre deux requêtes ; si le serveur l'a fermée pendant la pause
+        # (délai keep-alive), la requête est renvoyée une fois sur une nouvelle connexion
+        entetes = {'Content-Type': 'application/json'} if corps is not None else {}
+        reutilisee = self.connexion is not None
+        while True:
+            if self.connexion is None:
+                self.connexion = http.client.HTTPConnection(self.hote, self.port, timeout=self.delai)
+            try:
+                self.connexion.request(methode, self.prefixe + chemin,
+                                       body=json.dumps(corps) if corps is not None else None, headers=entetes)
+                reponse = self.connexion.getresponse()
+                return reponse.status, reponse.read()
+            except (BrokenPipeError, ConnectionResetError, http.client.RemoteDisconnected):
+                self.connexion.close()
+                self.connexion = None
+                if not reutilisee:
+                    raise
+                reutilisee = False
+            except (OSError, http.client.HTTPException):
+                self.connexion.close()
+                self.connexion = None
+                raise
+
+    def mesurer(self, nom, methode, chemin, corps=None):
+        debut = time.perf_counter()
+        try:
+            statut, contenu = self.requete(methode, chemin, corps)
+        except (OSError, http.client.HTTPException):
+            self.statistiques.enregistrer(nom, time.perf_counter() - debut, 0, True)
+            return None
+        # 204 : PreventUpdate, réponse normale
+        erreur = statut >= 400
+        self.statistiques.enregistrer(nom, time.perf_counter() - debut, len(contenu), erreur)
+        return None if erreur or statut == 204 else contenu
+
+    def monter(self, valeur, ancienne=None):
+        # Composants d'une propriété children remplacée : retire les anciens, enregistre les nouveaux
+        self.montes -= {composant['props'].get('id') for composant in composants(ancienne)}
+        nouveaux = set()
+        for composant in composants(valeur):
+            identifiant = composant['props'].get('id')
+            if not isinstance(identifiant, str):
+                continue
+            nouveaux.add(identifiant)
+            for propriete, contenu in composant['props'].items():
+                self.valeurs[f"{identifiant}.{propriete}"] = contenu
+            if 'options' in composant['props']:
+                self.options[identifiant] = [option['value'] if isinstance(option, dict) else option
+                                             for option in composant['props']['options']]
+        ajoutes = nouveaux - self.montes
+        self.montes |= nouveaux
+        return ajoutes
+
+    def appeler(self, callback, declencheurs):
+        entree = lambda dependance: {**dependance, 'value': self.valeurs.get(f"{dependance['id']}.{dependance['property']}")}
+        noms_sorties = sorties(callback)
+        corps = {
+            'output': callback['output'],
+            'outputs': [dict(zip(('id', 'property'), sortie.split('.'))) for sortie in noms_sorties]
+                       if callback['output'].startswith('..') else dict(zip(('id', 'property'), noms_sorties[0].split('.'))),
+            'inputs': [entree(dependance) for dependance in callback['inputs']],
+            'state': [entree(dependance) for dependance in callback['state']],
+            'changedPropIds': list(declencheurs),
+        }
+        nom = callback['output'].strip('.').replace('...', ' + ')
+        debut = time.perf_counter()
+        contenu = self.mesurer(nom, 'POST', '/_dash-update-component', corps)
+        if contenu is None:
+            return set(), set()
+        reponse = json.loads(contenu)
+        if callback.get('background') and 'job' in reponse:
+            # Callback en arrière-plan : interrogation jusqu'au résultat (mesuré de bout en bout)
+            chemin = f"/_dash-update-component?cacheKey={reponse['cacheKey']}&job={reponse['job']}"
+            while 'response' not in reponse:
+                time.sleep(callback['background'].get('interval', 1000) / 1000)
+                try:
+                    statut, contenu = self.requete('POST', chemin, corps)
+                except (OSError, http.client.HTTPException):
+                    statut = 599
+                if statut >= 400 or time.perf_counter() - debut > self.delai:
+                    self.statistiques.enregistrer(f"{nom} (résultat)", time.perf_counter() - debut, 0, True)
+                    return set(), set()
+                if statut == 204:
+                    # Pas de mise à jour (PreventUpdate ou tâche annulée)
+                    self.statistiques.enregistrer(f"{nom} (résultat)", time.perf_counter() - debut, 0, False)
+                    return set(), set()
+                reponse = json.loads(contenu)
+            self.statistiques.enregistrer(f"{nom} (résultat)", time.perf_counter() - debut, len(contenu), False)
+        changes, ajoutes = set(), set()
+        for identifiant, proprietes in reponse.get('response', {}).items():
+            for propriete, valeur in proprietes.items():
+                cle = f"{identifiant}.{propriete}"
+                ancienne = self.valeurs.get(cle)
+                if isinstance(valeur, dict) and '__dash_patch_update' in valeur:
+                    valeur = appliquer_patch(ancienne, valeur)
+                self.valeurs[cle] = valeur
+                changes.add(cle)
+                if propriete == 'children':
+                    ajoutes |= self.monter(valeur, ancienne)
+        return changes, ajoutes
+
+    def declencher(self, changes, ajoutes=()):
+        # Callbacks dont une entrée a changé, puis callbacks initiaux des composants nouvellement affichés
+        while changes or ajoutes:
+            a_appeler = []
+            for callback in self.dependances:
+                if not all(sortie.split('.')[0] in self.montes for sortie in sorties(callback)):
+                    continue
+                entrees = {f"{dependance['id']}.{dependance['property']}" for dependance in callback['inputs']}
+                if entrees & changes:
+                    a_appeler.append((callback, entrees & changes))
+                elif not callback['prevent_initial_call'] and {cle.split('.')[0] for cle in entrees} & set(ajoutes):
+                    a_appeler.append((callback, entrees))
+            changes, ajoutes = set(), set()
+            for callback, declencheurs in a_appeler:
+                nouveaux_changes, nouveaux_ajoutes = self.appeler(callback, declencheurs)
+                changes |= nouveaux_changes
+                ajoutes |= nouveaux_ajoutes
+
+    def changer(self, cle, valeur):
+        self.valeurs[cle] = valeur
+        self.declencher({cle})
+        time.sleep(random.uniform(0, 2 * self.pause))
+
+    def derouler(self, changements, fin):
+        # Chargement de la page, onglet 0, puis chaque onglet et ses listes déroulantes ; False si interrompue
+        self.valeurs, self.montes, self.options = {}, set(), {}
+        if self.mesurer('page', 'GET', '/') is None:
+            return False
+        self.mesurer('dependances', 'GET', '/_dash-dependencies')
+        mise_en_page = self.mesurer('mise_en_page', 'GET', '/_dash-layout')
+        if mise_en_page is None:
+            return False
+        ajoutes = self.monter(json.loads(mise_en_page))
+        self.declencher(set(), ajoutes)
+        onglets = [onglet['props']['value'] for onglet in self.valeurs.get('tabs-with-classes.children', [])]
+        actions = []
+        for onglet in random.sample(onglets, len(onglets)):
+            actions.append(('tabs-with-classes.value', onglet))
+            actions += [(liste, None) for liste in LISTES_DEROULANTES]
+        for cle, valeur in actions:
+            if time.perf_counter() >= fin:
+                return False
+            if cle == 'tabs-with-classes.value':
+                self.changer(cle, valeur)
+            elif cle in self.montes and self.options.get(cle):
+                # Liste déroulante de l'onglet affiché : quelques valeurs au hasard
+                for valeur in random.sample(self.options[cle], min(changements, len(self.options[cle]))):
+                    self.changer(f"{cle}.value", valeur)
+        return True
+
+
+def utilisateur(url, dependances, statistiques, fin, args, sessions):
+    session = Session(url, dependances, statistiques, args.pause, args.delai)
+    while time.perf_counter() < fin:
+        if session.derouler(args.changements, fin):
+            sessions.append(1)
+
+
+# 📌 Serveur local
+def port_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def demarrer_serveur(travailleurs, fils, attente):
+    port = port_libre()
+    serveur = subprocess.Popen([sys.executable, 'app.py', '--production', '--travailleurs', str(travailleurs),
+                                '--fils', str(fils), '--adresse', f'127.0.0.1:{port}'], cwd=DOSSIER)
+    url = f'http://127.0.0.1:{port}'
+    limite = time.perf_counter() + attente
+    # Le mode production charge les données et rend tous les états avant d'accepter des connexions
+    while time.perf_counter() < limite:
+        if serveur.poll() is not None:
+            sys.exit(f"le serveur s'est arrêté au démarrage (code {serveur.returncode})")
+        try:
+            connexion = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connexion.request('GET', '/')
+            if connexion.getresponse().status == 200:
+                return serveur, url
+        except OSError:
+            time.sleep(0.5)
+    serveur.terminate()
+    sys.exit(f"le serveur n'a pas répondu en {attente} s")
+
+
+def executer(url, pid, args):
+    dependances = json.loads(Session(url, [], None, 0, args.delai).requete('GET', '/_dash-dependencies')[1])
+
+    statistiques = Statistiques()
+    echantillonneur = Echantillonneur(pid, args.intervalle, statistiques)
+    echantillonneur.start()
+    sessions = []
+    debut = time.perf_counter()
+    fin = debut + args.duree
+    utilisateurs = []
+    for i in range(args.utilisateurs):
+        # Arrivée progressive des utilisateurs sur la durée de montée en charge
+        time.sleep(args.montee / args.utilisateurs)
+        fil = threading.Thread(target=utilisateur, args=(url, dependances, statistiques, fin, args, sessions), daemon=True)
+        fil.start()
+        utilisateurs.append(fil)
+    for fil in utilisateurs:
+        fil.join()
+    duree_totale = time.perf_counter() - debut
+    echantillonneur.arret.set()
+    echantillonneur.join()
+
+    callbacks = statistiques.resume(duree_totale)
+    releves = echantillonneur.releves
+    appels = sum(resultat['appels'] for resultat in callbacks.values())
+    erreurs = sum(resultat['erreurs'] for resultat in callbacks.values())
+    return {
+        'duree_s': round(duree_totale, 1),
+        'sessions': len(sessions),
+        'requetes': appels,
+        'requetes_par_s': round(appels / duree_totale, 2),
+        'taux_erreur': round(erreurs / appels, 4) if appels else 0.0,
+        'cpu_pourcent_moyen': round(float(np.mean([r['cpu_pourcent'] for r in releves])), 1) if releves else None,
+        'cpu_pourcent_max': max((r['cpu_pourcent'] for r in releves), default=None),
+        'memoire_max_octets': max((r['memoire_octets'] for r in releves), default=None),
+        'callbacks': callbacks,
+        'releves': releves,
+    }
+
+
+def afficher(resultats):
+    print(f"\n{'callback':58} {'appels':>7} {'err.':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Ko':>8}")
+    for nom, resultat in resultats['callbacks'].items():
+        print(f"{nom[:58]:58} {resultat['appels']:7d} {resultat['taux_erreur']:6.1%} {resultat.get('p50_ms', 0):9.1f} "
+              f"{resultat.get('p95_ms', 0):9.1f} {resultat.get('p99_ms', 0):9.1f} {resultat['taille_moyenne_octets'] / 1024:8.1f}")
+    print(f"\n{resultats['sessions']} sessions, {resultats['requetes']} requêtes en {resultats['duree_s']} s : "
+          f"{resultats['requetes_par_s']} requêtes/s, {resultats['taux_erreur']:.2%} d'erreurs")
+    if resultats['releves']:
+        print(f"Serveur : CPU moyen {resultats['cpu_pourcent_moyen']} % (max {resultats['cpu_pourcent_max']} %), "
+              f"mémoire max {resultats['memoire_max_octets'] / 1024 / 1024:.0f} Mo")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Test de charge du tableau de bord (utilisateurs simultanés)")
+    parser.add_argument('--utilisateurs', type=int, default=20, help="utilisateurs simultanés")
+    parser.add_argument('--duree', type=float, default=60, help="durée du test en secondes")
+    parser.add_argument('--montee', type=float, default=10, help="durée d'arrivée progressive des utilisateurs (s)")
+    parser.add_argument('--pause', type=float, default=1.0, help="temps de réflexion moyen entre deux actions (s)")
+    parser.add_argument('--changements', type=int, default=3, help="valeurs essayées par liste déroulante et par onglet")
+    parser.add_argument('--delai', type=float, default=60, help="délai maximal d'une requête (s)")
+    parser.add_argument('--intervalle', type=float, default=1.0, help="intervalle des relevés CPU et mémoire (s)")
+    parser.add_argument('--url', help="serveur déjà démarré à tester (sinon démarré localement)")
+    parser.add_argument('--pid', type=int, help="processus du serveur déjà démarré, pour les relevés CPU et mémoire")
+    parser.add_argument('--travailleurs', type=int, default=os.cpu_count() or 1, help="processus du serveur démarré")
+    parser.add_argument('--fils', type=int, default=4, help="fils par processus du serveur démarré")
+    parser.add_argument('--attente', type=float, default=600, help="délai maximal de démarrage du serveur (s)")
+    parser.add_argument('--sortie', default='charge.json', help="fichier JSON des résultats")
+    args = parser.parse_args()
+
+    serveur = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        serveur, url = demarrer_serveur(args.travailleurs, args.fils, args.attente)
+        pid = serveur.pid
+    try:
+        resultats = executer(url, pid, args)
+    finally:
+        if serveur is not None:
+            serveur.terminate()
+            serveur.wait()
+    resultats['parametres'] = {cle: valeur for cle, valeur in vars(args).items() if cle not in ('sortie',)}
+    resultats['date'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    afficher(resultats)
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {args.sortie}")
@@ -0,0 +1,107 @@
+# Agrégation régionale de l'export Index Egapro (déclarations par entreprise) :
+# le fichier est lu par morceaux, seules des sommes et des effectifs par (année, région)
+# sont gardés en mémoire, puis les moyennes des années retenues (par défaut la plus récente) sont écrites.
+# Les entreprises géolocalisées (sièges sociaux) sont placées dans les régions par un index spatial
+# et regroupées par case de grille pour les marqueurs groupés de la carte plotly.
+import os
+import numpy as np
+import pandas as pd
+import shapely
+
+# Colonnes de l'export Egapro
+COLONNE_ANNEE = "Année"
+COLONNE_TRANCHE = "Tranche d'effectifs"
+COLONNE_REGION = "Région"
+COLONNE_NAF = "Code NAF"
+
+# Noms de régions de l'export -> noms de data/region.geojson
+ALIAS_REGIONS = {
+    "Grand Est": "Grand-Est",
+}
+
+
+def filtrer(morceau, tranches, annees, secteurs):
+    garder = pd.Series(True, index=morceau.index)
+    if tranches:
+        garder &= morceau[COLONNE_TRANCHE].isin(tranches)
+    if annees:
+        garder &= morceau[COLONNE_ANNEE].isin(annees)
+    if secteurs:
+        # Code NAF de la forme "35.11Z - Production d'électricité" : filtre par préfixe
+        garder &= morceau[COLONNE_NAF].fillna("").str.startswith(tuple(secteurs))
+    return morceau[garder]
+
+
+def agreger_regions(chemin, indicateurs, tranches=("1000 et plus",), annees=None, secteurs=None,
+                    separateur=";", taille_morceau=50000):
+    # Moyenne par région de chaque indicateur (notes non numériques ignorées) sur les déclarations
+    # des années `annees` réunies, ou de la plus récente si `annees` est vide
+    colonnes = [COLONNE_ANNEE, COLONNE_TRANCHE, COLONNE_REGION, COLONNE_NAF, *indicateurs]
+    sommes, nombres, derniere_annee = None, None, None
+    lecteur = pd.read_csv(chemin, sep=separateur, usecols=lambda colonne: colonne in colonnes,
+                          dtype=str, chunksize=taille_morceau)
+    for morceau in lecteur:
+        morceau[COLONNE_ANNEE] = pd.to_numeric(morceau[COLONNE_ANNEE], errors="coerce")
+        morceau = filtrer(morceau, tranches, annees, secteurs)
+        if not annees and not morceau.empty:
+            # Seule la plus récente année vue est accumulée : une année plus récente repart de zéro
+            annee = morceau[COLONNE_ANNEE].max()
+            if pd.notna(annee) and (derniere_annee is None or annee > derniere_annee):
+                derniere_annee, sommes, nombres = annee, None, None
+            morceau = morceau[morceau[COLONNE_ANNEE] == derniere_annee]
+        if morceau.empty:
+            continue
+        notes = morceau[list(indicateurs)].apply(pd.to_numeric, errors="coerce")
+        groupes = notes.groupby(morceau[COLONNE_REGION].replace(ALIAS_REGIONS))
+        sommes = groupes.sum().add(sommes, fill_value=0) if sommes is not None else groupes.sum()
+        nombres = groupes.count().add(nombres, fill_value=0) if nombres is not None else groupes.count()
+    if sommes is None:
+        raise ValueError(f"aucune déclaration ne correspond aux filtres dans {chemin}")
+    moyennes = (sommes / nombres).round(2)
+    moyennes.index.name = "Région"
+    return moyennes.sort_index().reset_index()
+
+
+def ecrire_maps(moyennes, destination):
+    # Écriture atomique : le fichier peut être relu à chaud par le serveur pendant l'écriture
+    temporaire = f"{destination}.{os.getpid()}.tmp"
+    moyennes.to_csv(temporaire, index=False)
+    os.replace(temporaire, destination)
+
+
+def placer_entreprises(longitudes, latitudes, regions, geometries):
+    # Région de chaque siège social (None hors des polygones) : une seule requête groupée dans un
+    # index spatial (STRtree) des régions, au lieu d'un test point-dans-polygone par entreprise et par région
+    points = shapely.points(longitudes, latitudes)
+    indices_points, indices_regions = shapely.STRtree(geometries).query(points, predicate="intersects")
+    # Point sur une frontière commune : première région trouvée
+    indices_points, premiers = np.unique(indices_points, return_index=True)
+    placees = np.full(len(points), None, dtype=object)
+    placees[indices_points] = np.asarray(regions, dtype=object)[indices_regions[premiers]]
+    return placees
+
+
+def agreger_entreprises(entreprises, indicateurs):
+    # Moyenne par région des notes des entreprises placées (notes non numériques ignorées)
+    notes = entreprises[list(indicateurs)].apply(pd.to_numeric, errors="coerce")
+    moyennes = notes.groupby(entreprises[COLONNE_REGION]).mean().round(2)
+    moyennes.index.name = "Région"
+    return moyennes.sort_index().reset_index()
+
+
+def regrouper_entreprises(longitudes, latitudes, pas):
+    # Groupe de chaque siège social (case de `pas` degrés de côté), centre et effectif de chaque groupe
+    cases = np.stack([np.floor(longitudes / pas), np.floor(latitudes / pas)], axis=1)
+    _, groupes, effectifs = np.unique(cases, axis=0, return_inverse=True, return_counts=True)
+    groupes = groupes.ravel()
+    centres = np.stack([np.bincount(groupes, longitudes), np.bincount(groupes, latitudes)], axis=1) / effectifs[:, None]
+    return groupes, centres, effectifs
+
+
+def moyennes_groupes(groupes, notes, nombre_groupes):
+    # Moyenne par groupe des notes numériques (NaN si aucune note dans le groupe)
+    renseignees = ~np.isnan(notes)
+    sommes = np.bincount(groupes[renseignees], notes[renseignees], minlength=nombre_groupes)
+    nombres = np.bincount(groupes[renseignees], minlength=nombre_groupes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sommes / nombres
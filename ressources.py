@@ -0,0 +1,107 @@
+# Ressources front de la carte folium (Leaflet, jQuery, Bootstrap, awesome-markers, d3, topojson)
+# et logo EDF copiés dans assets/vendor, pour un déploiement sans accès à Internet.
+# Chaque ressource est rangée dans un dossier nommé d'après son contenu (servi avec cache immuable),
+# avec ses variantes précompressées .gz (et .br si le module brotli est installé).
+import os
+import re
+import json
+import gzip
+import hashlib
+import posixpath
+import urllib.parse
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DOSSIER_VENDOR = "assets/vendor"
+MANIFESTE = os.path.join(DOSSIER_VENDOR, "manifeste.json")
+
+LOGO_EDF = "https://upload.wikimedia.org/wikipedia/commons/1/12/%C3%89lectricit%C3%A9_de_France_logo.svg"
+
+# Noms locaux des ressources dont le nom d'origine n'est pas utilisable tel quel dans une URL
+NOMS_LOCAUX = {LOGO_EDF: "logo_edf.svg"}
+
+# Extensions compressibles (les polices woff/woff2 et les images PNG le sont déjà)
+EXTENSIONS_COMPRESSEES = ('.js', '.css', '.svg', '.json', '.ttf', '.eot', '.html')
+
+
+def urls_externes(page):
+    # Scripts et feuilles de style chargés depuis un CDN par une page HTML
+    return re.findall(r'<(?:script[^>]*\bsrc|link[^>]*\bhref)="(https?://[^"]+)"', page)
+
+
+def telecharger(url):
+    requete = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    with urllib.request.urlopen(requete, timeout=30) as reponse:
+        return reponse.read()
+
+
+def dependances_css(url, contenu):
+    # Fichiers référencés par url(...) dans une feuille de style (polices, images), rangés à côté d'elle
+    fichiers = {}
+
+    def remplacer(correspondance):
+        reference = correspondance.group(2)
+        if reference.startswith(('data:', '#')):
+            return correspondance.group(0)
+        adresse = urllib.parse.urljoin(url, reference)
+        nom = posixpath.basename(urllib.parse.urlsplit(adresse).path)
+        if nom not in fichiers:
+            fichiers[nom] = telecharger(adresse)
+        return f"url({correspondance.group(1)}{nom}{correspondance.group(1)})"
+
+    contenu = re.sub(r"""url\((['"]?)([^'")]+)\1\)""", remplacer, contenu.decode('utf-8'))
+    return contenu.encode('utf-8'), fichiers
+
+
+def ecrire(chemin, contenu):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin, 'wb') as f:
+        f.write(contenu)
+    if chemin.endswith(EXTENSIONS_COMPRESSEES):
+        with open(f"{chemin}.gz", 'wb') as f:
+            f.write(gzip.compress(contenu, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(f"{chemin}.br", 'wb') as f:
+                f.write(brotli.compress(contenu))
+
+
+def vendoriser(urls, dossier=DOSSIER_VENDOR):
+    # Télécharge chaque URL (et les fichiers de ses feuilles de style) ; renvoie le manifeste URL -> chemin local
+    manifeste = {}
+    for url in sorted(set(urls)):
+        nom = NOMS_LOCAUX.get(url) or posixpath.basename(urllib.parse.urlsplit(url).path)
+        contenu = telecharger(url)
+        fichiers = {}
+        if nom.endswith('.css'):
+            contenu, fichiers = dependances_css(url, contenu)
+        fichiers[nom] = contenu
+        empreinte = hashlib.sha256()
+        for nom_fichier in sorted(fichiers):
+            empreinte.update(nom_fichier.encode() + fichiers[nom_fichier])
+        sous_dossier = f"{posixpath.splitext(nom)[0]}-{empreinte.hexdigest()[:12]}"
+        for nom_fichier, contenu_fichier in fichiers.items():
+            ecrire(os.path.join(dossier, sous_dossier, nom_fichier), contenu_fichier)
+        manifeste[url] = f"{sous_dossier}/{nom}"
+        print(f"{url} -> {manifeste[url]}")
+    with open(os.path.join(dossier, "manifeste.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, indent=2)
+    return manifeste
+
+
+def charger_manifeste(chemin=MANIFESTE):
+    # Manifeste absent : ressources non copiées, les URL des CDN sont gardées
+    if not os.path.exists(chemin):
+        return {}
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def reecrire(page, urls_locales):
+    # Remplace dans une page HTML chaque URL de CDN copiée par son URL locale
+    for url, locale in urls_locales.items():
+        page = page.replace(url, locale)
+    return page
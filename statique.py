@@ -0,0 +1,211 @@
+# Export statique du tableau de bord : les composants Dash sérialisés (format JSON de Dash) sont
+# convertis en HTML, une page par onglet. Les listes déroulantes basculent côté navigateur entre
+# des états pré-rendus (figures plotly ou fragments HTML), sans serveur.
+import re
+import json
+import html
+
+# Balises HTML sans contenu
+BALISES_VIDES = {'img', 'hr', 'br', 'input', 'col', 'source', 'wbr'}
+
+# Composants dash-bootstrap-components rendus comme des div avec leurs classes Bootstrap
+CLASSES_DBC = {'Container': 'container', 'Row': 'row', 'Col': 'col', 'Alert': 'alert'}
+
+# Propriétés CSS numériques sans unité (les autres nombres sont en pixels, comme dans React)
+CSS_SANS_UNITE = {'opacity', 'z-index', 'font-weight', 'flex', 'flex-grow', 'flex-shrink', 'line-height', 'order'}
+
+# Valeur remplaçant un contenu commun à plusieurs figures, restauré par le script des pages
+GEOMETRIE = 'GEOMETRIE'
+MODELE = 'MODELE'
+
+SCRIPT_PAGES = """(function () {
+    var donnees = window.EXPORT;
+
+    // Contenus communs écrits une seule fois (modèle de mise en page, géométrie des régions)
+    function figure(contenu) {
+        if (contenu.layout && contenu.layout.template === 'MODELE') {
+            contenu.layout.template = window.EXPORT_MODELE;
+        }
+        (contenu.data || []).forEach(function (trace) {
+            if (trace.geojson === 'GEOMETRIE') {
+                trace.geojson = window.EXPORT_GEOMETRIE;
+            }
+        });
+        return contenu;
+    }
+
+    function afficher(identifiant, contenu, type) {
+        var element = document.getElementById(identifiant);
+        if (!element || contenu === undefined) {
+            return;
+        }
+        if (type === 'figure') {
+            contenu = figure(contenu);
+            Plotly.react(element, {data: contenu.data, layout: contenu.layout, frames: contenu.frames, config: {responsive: true}});
+        } else {
+            element.innerHTML = contenu;
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        Object.keys(donnees.figures).forEach(function (identifiant) {
+            afficher(identifiant, donnees.figures[identifiant], 'figure');
+        });
+        donnees.liaisons.forEach(function (liaison) {
+            var liste = document.getElementById(liaison.source);
+            function changer() {
+                var etat = liaison.etats[liste.value];
+                if (etat) {
+                    liaison.cibles.forEach(function (cible, i) { afficher(cible[0], etat[i], cible[1]); });
+                }
+            }
+            liste.addEventListener('change', changer);
+            changer();
+        });
+    });
+})();
+"""
+
+GABARIT_PAGE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>{titre}</title>
+<link rel="stylesheet" href="ressources/style.css">
+<script src="ressources/plotly.min.js"></script>
+<script src="donnees/modele.js"></script>
+{scripts}<script src="donnees/{page}.js"></script>
+<script src="ressources/export.js"></script>
+</head>
+<body>
+{corps}
+</body>
+</html>
+"""
+
+
+def style_css(style):
+    declarations = []
+    for propriete, valeur in style.items():
+        propriete = re.sub(r'([A-Z])', r'-\1', propriete).lower()
+        if isinstance(valeur, (int, float)) and propriete not in CSS_SANS_UNITE:
+            valeur = f"{valeur}px"
+        declarations.append(f"{propriete}: {valeur}")
+    return '; '.join(declarations)
+
+
+def attributs(props, classes=()):
+    valeurs = {}
+    if isinstance(props.get('id'), str):
+        valeurs['id'] = props['id']
+    classes = [*classes, props.get('className')]
+    if any(classes):
+        valeurs['class'] = ' '.join(classe for classe in classes if classe)
+    if props.get('style'):
+        valeurs['style'] = style_css(props['style'])
+    for cle in ('href', 'src', 'target', 'title', 'alt', 'value', 'max'):
+        if props.get(cle) is not None and not isinstance(props[cle], (dict, list)):
+            valeurs[cle] = props[cle]
+    return ''.join(f' {cle}="{html.escape(str(valeur))}"' for cle, valeur in valeurs.items())
+
+
+def options(props):
+    for option in props.get('options') or []:
+        if isinstance(option, dict):
+            yield option['value'], option.get('label', option['value'])
+        else:
+            yield option, option
+
+
+class Page:
+    # Page d'un onglet : figures à afficher au chargement, fichiers des autres onglets (liens)
+
+    def __init__(self, onglet, fichiers_onglets):
+        self.onglet = onglet
+        self.fichiers_onglets = fichiers_onglets
+        self.figures = {}
+        self.anonymes = 0  # graphiques sans identifiant
+
+    def vers_html(self, composant):
+        if composant is None or isinstance(composant, bool):
+            return ''
+        if isinstance(composant, (str, int, float)):
+            return html.escape(str(composant))
+        if isinstance(composant, list):
+            return ''.join(self.vers_html(enfant) for enfant in composant)
+        type_composant, props = composant['type'], composant['props']
+        enfants = self.vers_html(props.get('children'))
+        if composant['namespace'] == 'dash_html_components':
+            balise = type_composant.lower()
+            if balise in BALISES_VIDES:
+                return f"<{balise}{attributs(props)}>"
+            return f"<{balise}{attributs(props)}>{enfants}</{balise}>"
+        if type_composant == 'Graph':
+            if not isinstance(props.get('id'), str):
+                self.anonymes += 1
+                props = {**props, 'id': f"graphique-{self.anonymes}"}
+            figure = props.get('figure') or {}
+            if figure.get('data'):
+                self.figures[props['id']] = figure
+            return f"<div{attributs(props, ['graphique'])}></div>"
+        if type_composant in ('Dropdown', 'Select'):
+            choix = [f'<option value="">{html.escape(props.get("placeholder") or "")}</option>'] if props.get('value') is None else []
+            for valeur, libelle in options(props):
+                selection = ' selected' if valeur == props.get('value') else ''
+                choix.append(f'<option value="{html.escape(str(valeur))}"{selection}>{html.escape(str(libelle))}</option>')
+            return f"<select{attributs({k: v for k, v in props.items() if k != 'value'})}>{''.join(choix)}</select>"
+        if type_composant == 'Tabs':
+            return f"<nav{attributs({'className': props.get('className')})}>{enfants}</nav>"
+        if type_composant == 'Tab':
+            classes = [props.get('className')]
+            if props.get('value') == self.onglet:
+                classes.append(props.get('selected_className'))
+            lien = self.fichiers_onglets.get(props.get('value'), '#')
+            return f'<a{attributs({}, classes)} href="{lien}">{html.escape(str(props.get("label", "")))}</a>'
+        if type_composant in CLASSES_DBC:
+            classe = CLASSES_DBC[type_composant]
+            if type_composant == 'Col' and props.get('width'):
+                classe = f"col-{props['width']}"
+            if type_composant == 'Alert':
+                classe = f"alert alert-{props.get('color', 'primary')}"
+            if type_composant == 'Container' and props.get('fluid'):
+                classe = 'container-fluid'
+            return f"<div{attributs(props, [classe])}>{enfants}</div>"
+        # dcc.Store, dcc.Interval... : pas de rendu statique
+        return ''
+
+
+def remplacer_enfants(arbre, identifiant, enfants):
+    # Remplace les enfants du composant `identifiant` dans un arbre sérialisé ; True si trouvé
+    if isinstance(arbre, list):
+        return any(remplacer_enfants(enfant, identifiant, enfants) for enfant in arbre)
+    if not isinstance(arbre, dict) or 'props' not in arbre:
+        return False
+    if arbre['props'].get('id') == identifiant:
+        arbre['props']['children'] = enfants
+        return True
+    return any(remplacer_enfants(valeur, identifiant, enfants) for valeur in arbre['props'].values())
+
+
+def graphiques(arbre):
+    # Identifiants des dcc.Graph d'un arbre sérialisé, dans l'ordre d'affichage
+    if isinstance(arbre, list):
+        return [identifiant for enfant in arbre for identifiant in graphiques(enfant)]
+    if not isinstance(arbre, dict) or 'props' not in arbre:
+        return []
+    propres = [arbre['props']['id']] if arbre.get('type') == 'Graph' and isinstance(arbre['props'].get('id'), str) else []
+    return propres + [identifiant for valeur in arbre['props'].values() for identifiant in graphiques(valeur)]
+
+
+def mettre_en_commun(figure, modele, geometrie):
+    # Remplace le modèle de mise en page et la géométrie des régions par une référence aux fichiers communs
+    if figure.get('layout', {}).get('template') == modele:
+        figure['layout']['template'] = MODELE
+    for trace in figure.get('data', []):
+        if geometrie is not None and trace.get('geojson') == geometrie:
+            trace['geojson'] = GEOMETRIE
+    return figure
+
+
+def script_donnees(variable, valeur):
+    return f"window.{variable} = {json.dumps(valeur, ensure_ascii=False, separators=(',', ':'))};\n"
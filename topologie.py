@@ -0,0 +1,114 @@
+# Encodage TopoJSON des régions : coordonnées quantifiées sur une grille entière,
+# frontières communes découpées en arcs partagés (chaque frontière n'est écrite qu'une fois),
+# simplification appliquée aux arcs pour que deux régions voisines restent jointives.
+import numpy as np
+import shapely
+
+
+def polygones(geometrie):
+    if geometrie.geom_type == 'Polygon':
+        return [geometrie]
+    return list(geometrie.geoms)
+
+
+def quantifier(anneau, origine, pas):
+    points = np.round((np.asarray(anneau.coords)[:, :2] - origine) / pas).astype(np.int64)
+    # Suppression des points consécutifs confondus après quantification
+    garder = np.ones(len(points), dtype=bool)
+    garder[1:] = np.any(points[1:] != points[:-1], axis=1)
+    return [tuple(point) for point in points[garder].tolist()]
+
+
+def rotation_canonique(points):
+    # Anneau sans jonction : commence au plus petit point, pour reconnaître le même anneau partagé
+    debut = points.index(min(points))
+    return points[debut:] + points[:debut]
+
+
+def decouper(anneau, jonctions):
+    # Découpe un anneau fermé en arcs allant d'une jonction à la suivante
+    points = anneau[:-1]
+    positions = [i for i, point in enumerate(points) if point in jonctions]
+    if not positions:
+        points = rotation_canonique(points)
+        return [points + points[:1]]
+    points = points[positions[0]:] + points[:positions[0]]
+    positions = [position - positions[0] for position in positions] + [len(points)]
+    points = points + points[:1]
+    return [points[debut:fin + 1] for debut, fin in zip(positions[:-1], positions[1:])]
+
+
+def simplifier(arc, tolerance):
+    if not tolerance or len(arc) <= 2:
+        return arc
+    simplifie = [tuple(point) for point in np.asarray(shapely.LineString(arc).simplify(tolerance).coords, dtype=np.int64).tolist()]
+    if arc[0] == arc[-1] and len(simplifie) < 4:
+        return arc
+    return simplifie
+
+
+def construire_topologie(regions, quantification=100000, tolerance=0.0, nom_objet='regions'):
+    # regions : liste de (propriétés, géométrie shapely en lon/lat) ; tolérance en degrés
+    geometries = [geometrie for _, geometrie in regions]
+    xmin, ymin, xmax, ymax = shapely.total_bounds(geometries)
+    pas = np.array([(xmax - xmin) / (quantification - 1) or 1.0, (ymax - ymin) / (quantification - 1) or 1.0])
+    origine = np.array([xmin, ymin])
+
+    anneaux = [
+        [[quantifier(anneau, origine, pas) for anneau in [polygone.exterior, *polygone.interiors]]
+         for polygone in polygones(geometrie)]
+        for geometrie in geometries
+    ]
+
+    # Jonctions : points dont les voisins diffèrent d'un anneau à l'autre (début ou fin d'une frontière commune)
+    voisins = {}
+    jonctions = set()
+    for polygones_region in anneaux:
+        for polygone in polygones_region:
+            for anneau in polygone:
+                points = anneau[:-1]
+                for i, point in enumerate(points):
+                    paire = frozenset((points[i - 1], points[(i + 1) % len(points)]))
+                    if voisins.setdefault(point, paire) != paire:
+                        jonctions.add(point)
+
+    arcs = []
+    index_arcs = {}
+
+    def reference(arc):
+        cle = tuple(arc)
+        if cle in index_arcs:
+            return index_arcs[cle]
+        # Un anneau sans jonction commence à son plus petit point : son inverse aussi
+        inverse = tuple(reversed(arc))
+        if inverse in index_arcs:
+            return ~index_arcs[inverse]
+        index_arcs[cle] = len(arcs)
+        arcs.append(arc)
+        return index_arcs[cle]
+
+    objets = []
+    for (proprietes, _), polygones_region in zip(regions, anneaux):
+        references = [
+            [[reference(arc) for arc in decouper(anneau, jonctions)] for anneau in polygone]
+            for polygone in polygones_region
+        ]
+        if len(references) == 1:
+            objets.append({'type': 'Polygon', 'arcs': references[0], 'properties': proprietes})
+        else:
+            objets.append({'type': 'MultiPolygon', 'arcs': references, 'properties': proprietes})
+
+    # Simplification des arcs (une seule fois par frontière), puis codage en différences
+    tolerance_grille = tolerance / pas.min() if tolerance else 0
+    arcs_codes = []
+    for arc in arcs:
+        points = np.array(simplifier(arc, tolerance_grille), dtype=np.int64)
+        points[1:] = np.diff(points, axis=0)
+        arcs_codes.append(points.tolist())
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': pas.tolist(), 'translate': origine.tolist()},
+        'objects': {nom_objet: {'type': 'GeometryCollection', 'geometries': objets}},
+        'arcs': arcs_codes,
+    }